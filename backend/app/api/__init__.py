@@ -1,12 +1,25 @@
 from fastapi import APIRouter
+from app.core.config import settings
 
 
-from .mock_endpoints import router as mock_router
-from .appointments import router as appointments_router
+from .metrics import router as metrics_router
+from .schedule_feed import router as schedule_feed_router
 
 router = APIRouter()
 
-# Register mock endpoints for analytics, reports, scheduler
-router.include_router(mock_router)
-# Register appointments endpoints (smart/manual booking)
-router.include_router(appointments_router)
+# Prometheus metrics (see app.core.metrics)
+router.include_router(metrics_router)
+# Scheduler change feed (SSE)
+router.include_router(schedule_feed_router)
+
+if settings.ASYNC_DB:
+    # Async booking and analytics endpoints on the asyncpg/aiosqlite engine
+    from .async_endpoints import router as async_router
+    router.include_router(async_router)
+else:
+    from .analytics import router as analytics_router
+    from .appointments import router as appointments_router
+    # Register analytics and report endpoints (served from daily rollups)
+    router.include_router(analytics_router)
+    # Register appointments endpoints (smart/manual booking)
+    router.include_router(appointments_router)
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from app.core import database
+from app.core.cache import response_cache
+from app.core.responses import ORJSONResponse
+from app.models.base import DEFAULT_SITE_ID
+from app.services import forecasting, listings, reports, snapshots
+
+router = APIRouter()
+
+def parse_date(date: str):
+    try:
+        return reports.parse_day(date)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="date must be YYYY-MM-DD")
+
+@router.get("/api/analytics/dashboard")
+def get_dashboard(request: Request, date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID), db: Session = Depends(database.get_db)):
+    day = parse_date(date)
+    return response_cache.cached(
+        request, "dashboard", {"date": date}, reports.source_dates("dashboard", day),
+        lambda: reports.build_dashboard(db, day, site_id), site_id,
+    )
+
+@router.get("/api/analytics")
+def get_analytics(request: Request, date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID), db: Session = Depends(database.get_db)):
+    day = parse_date(date)
+    return response_cache.cached(
+        request, "analytics", {"date": date}, reports.source_dates("analytics", day),
+        lambda: reports.build_analytics(db, day, site_id), site_id,
+    )
+
+@router.get("/api/scheduler")
+def get_scheduler(
+    request: Request, date: str = Query(...), type: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID),
+    db: Session = Depends(database.get_db),
+):
+    day = parse_date(date)
+    return response_cache.cached(
+        request, "scheduler", {"date": date, "type": type}, [day],
+        lambda: listings.scheduler_view(db, day, site_id), site_id,
+    )
+
+@router.get("/api/reports")
+def get_reports(
+    request: Request, type: str = Query(...), date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID),
+    db: Session = Depends(database.get_db),
+):
+    day = parse_date(date)
+    return response_cache.cached(
+        request, "reports", {"type": type, "date": date}, reports.source_dates(type, day),
+        lambda: snapshots.get_or_build(db, type, day, site_id), site_id,
+    )
+
+@router.get("/api/forecast/no-shows")
+def get_no_show_forecast(date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID), db: Session = Depends(database.get_db)):
+    # Week of predicted no-show rates from `date`, plus the day's overbooking candidates
+    day = parse_date(date)
+    return {
+        "days": forecasting.week_forecast(db, day, site_id),
+        "overbook": forecasting.overbook_candidates(db, day, site_id=site_id),
+    }
+
+@router.get("/api/staff/productivity", response_class=ORJSONResponse)
+def get_staff_productivity(
+    start_date: str = Query(...), end_date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID),
+    db: Session = Depends(database.get_db),
+):
+    # Sessions, revenue, utilization and commission per active employee of the site over the range
+    try:
+        return ORJSONResponse({"employees": listings.productivity(db, parse_date(start_date), parse_date(end_date), site_id)})
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+@router.get("/api/cache/stats")
+def get_cache_stats():
+    return response_cache.stats()
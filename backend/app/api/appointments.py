@@ -1,44 +1,123 @@
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.schemas.appointment import AppointmentCreate, AppointmentManualCreate, AppointmentOut
+from app.schemas.appointment import (
+    AppointmentCreate, AppointmentManualCreate, AppointmentOut, OptimizeDay, RecurringAppointmentCreate,
+)
 from app.core import database
-from app.models.base import Appointment
-from app.core import scheduler
-from datetime import datetime
+from app.core.responses import ORJSONResponse
+from app.models.base import DEFAULT_SITE_ID, RoleEnum
+from app.services import availability, booking, listings, optimizer, recurring
+from app.api.analytics import parse_date
 
 router = APIRouter()
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_db
 
 @router.post("/api/appointments/smart-book", response_model=AppointmentOut)
 def smart_book_appointment(payload: AppointmentCreate, db: Session = Depends(get_db)):
     # Use the smart scheduler to suggest and book a slot
-    suggestion = scheduler.suggest_slot(payload, db)
-    if not suggestion:
-        raise HTTPException(status_code=400, detail="No available slot found.")
-    appointment = Appointment(**suggestion.dict())
-    db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
-    return appointment
+    try:
+        return booking.smart_book(db, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except booking.NoSlotAvailable as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except booking.BookingConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
 
 @router.post("/api/appointments/manual-book", response_model=AppointmentOut)
 def manual_book_appointment(payload: AppointmentManualCreate, db: Session = Depends(get_db)):
-    # Directly assign a room and timeslot, only check for basic conflicts
-    conflict = db.query(Appointment).filter(
-        Appointment.room_id == payload.room_id,
-        Appointment.start_time < payload.end_time,
-        Appointment.end_time > payload.start_time
-    ).first()
-    if conflict:
-        raise HTTPException(status_code=409, detail="Room is already booked for this timeslot.")
-    appointment = Appointment(**payload.dict())
-    db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
-    return appointment
+    # Directly assign a room and timeslot, only check for room/therapist conflicts
+    try:
+        return booking.manual_book(db, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except booking.BookingConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+def series_conflict(exc):
+    # 409 listing every occurrence, with alternatives for the conflicting ones
+    return HTTPException(status_code=409, detail={"message": str(exc), "occurrences": jsonable_encoder(exc.occurrences)})
+
+@router.post("/api/appointments/recurring")
+def book_recurring_appointments(payload: RecurringAppointmentCreate, db: Session = Depends(get_db)):
+    # Book a daily/weekly series (e.g. a treatment package): every occurrence is
+    # checked with one query and the series is inserted in one transaction
+    try:
+        return recurring.book_series(db, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except recurring.SeriesConflict as exc:
+        raise series_conflict(exc)
+    except booking.BookingConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+def batch_requests(payload):
+    return [{"therapist": request.therapist_id, "room": request.room_id} for request in payload.requests]
+
+@router.post("/api/scheduler/optimize")
+def optimize_day(payload: OptimizeDay, db: Session = Depends(get_db)):
+    # "Optimize tomorrow": assign a day's pending requests in one solve. Nothing
+    # is booked; the front desk books the assignments it accepts.
+    try:
+        return {"assignments": optimizer.optimize_day(db, payload.site_id, payload.date, batch_requests(payload))}
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+def availability_params(
+    start_date: str = Query(...),
+    end_date: str = Query(None),
+    duration: int = Query(60, gt=0, le=600),
+    roles: List[RoleEnum] = Query(None),
+    therapist_ids: List[int] = Query(None),
+    room_ids: List[int] = Query(None),
+    step: int = Query(30, gt=0, le=240),
+    limit: int = Query(200, gt=0, le=availability.MAX_RESULTS),
+    site_id: int = Query(DEFAULT_SITE_ID),
+):
+    first_day = parse_date(start_date)
+    last_day = parse_date(end_date) if end_date else first_day
+    return dict(
+        first_day=first_day, last_day=last_day, duration_minutes=duration, roles=roles,
+        therapist_ids=therapist_ids, room_ids=room_ids, step_minutes=step, limit=limit,
+        not_before=datetime.now(), site_id=site_id,
+    )
+
+def stream_availability(hits):
+    return StreamingResponse(availability.ndjson(hits), media_type="application/x-ndjson")
+
+@router.get("/api/availability/search")
+def search_availability(params: dict = Depends(availability_params), db: Session = Depends(get_db)):
+    # Ranked free (therapist, room, start) slots over a date range, streamed as NDJSON
+    try:
+        hits = availability.search_availability(db, **params)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return stream_availability(hits)
+
+def listing_params(
+    start_date: str = Query(...),
+    end_date: str = Query(None),
+    therapist_ids: List[int] = Query(None),
+    room_ids: List[int] = Query(None),
+    status: str = Query(None),
+    site_id: int = Query(DEFAULT_SITE_ID),
+):
+    first_day = parse_date(start_date)
+    last_day = parse_date(end_date) if end_date else first_day
+    return dict(
+        first_day=first_day, last_day=last_day, therapist_ids=therapist_ids, room_ids=room_ids, status=status,
+        site_id=site_id,
+    )
+
+@router.get("/api/appointments", response_class=ORJSONResponse)
+def list_appointments(params: dict = Depends(listing_params), db: Session = Depends(get_db)):
+    # Day/week listing with therapist, room and patient names, in one query
+    try:
+        return ORJSONResponse({"appointments": listings.appointments(db, **params)})
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
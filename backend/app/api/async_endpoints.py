@@ -0,0 +1,136 @@
+# Async versions of the booking and analytics routes, used when ASYNC_DB is set.
+# The service functions are shared with the sync routes and run on the async
+# session through run_sync, so no threadpool worker is held during DB round-trips.
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.appointment import (
+    AppointmentCreate, AppointmentManualCreate, AppointmentOut, OptimizeDay, RecurringAppointmentCreate,
+)
+from app.core.cache import response_cache
+from app.core.database_async import get_async_db
+from app.core.responses import ORJSONResponse
+from app.models.base import DEFAULT_SITE_ID
+from app.services import availability, booking, forecasting, listings, optimizer, recurring, reports, snapshots
+from app.api.analytics import parse_date
+from app.api.appointments import availability_params, batch_requests, listing_params, series_conflict, stream_availability
+
+router = APIRouter()
+
+@router.post("/api/appointments/smart-book", response_model=AppointmentOut)
+async def smart_book_appointment(payload: AppointmentCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await db.run_sync(booking.smart_book, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except booking.NoSlotAvailable as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except booking.BookingConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+@router.post("/api/appointments/manual-book", response_model=AppointmentOut)
+async def manual_book_appointment(payload: AppointmentManualCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await db.run_sync(booking.manual_book, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except booking.BookingConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+@router.post("/api/appointments/recurring")
+async def book_recurring_appointments(payload: RecurringAppointmentCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await db.run_sync(recurring.book_series, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except recurring.SeriesConflict as exc:
+        raise series_conflict(exc)
+    except booking.BookingConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+@router.post("/api/scheduler/optimize")
+async def optimize_day(payload: OptimizeDay, db: AsyncSession = Depends(get_async_db)):
+    try:
+        loaded = await db.run_sync(optimizer.load_day, payload.site_id, payload.date)
+        # The solve holds no session; keep it off the event loop
+        assignments = await run_in_threadpool(optimizer.solve, loaded, batch_requests(payload))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {"assignments": assignments}
+
+@router.get("/api/availability/search")
+async def search_availability(params: dict = Depends(availability_params), db: AsyncSession = Depends(get_async_db)):
+    try:
+        hits = await db.run_sync(lambda session: availability.search_availability(session, **params))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return stream_availability(hits)
+
+@router.get("/api/appointments", response_class=ORJSONResponse)
+async def list_appointments(params: dict = Depends(listing_params), db: AsyncSession = Depends(get_async_db)):
+    try:
+        rows = await db.run_sync(lambda session: listings.appointments(session, **params))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return ORJSONResponse({"appointments": rows})
+
+async def _cached(request, endpoint, site_id, params, dates, db, build, *args):
+    # build(session, *args, site_id)
+    key, entry = response_cache.lookup(endpoint, params, dates, site_id)
+    if entry is None:
+        entry = response_cache.store(key, await db.run_sync(build, *args, site_id))
+    return response_cache.respond(request, entry)
+
+@router.get("/api/analytics/dashboard")
+async def get_dashboard(request: Request, date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID), db: AsyncSession = Depends(get_async_db)):
+    day = parse_date(date)
+    return await _cached(request, "dashboard", site_id, {"date": date}, reports.source_dates("dashboard", day), db, reports.build_dashboard, day)
+
+@router.get("/api/analytics")
+async def get_analytics(request: Request, date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID), db: AsyncSession = Depends(get_async_db)):
+    day = parse_date(date)
+    return await _cached(request, "analytics", site_id, {"date": date}, reports.source_dates("analytics", day), db, reports.build_analytics, day)
+
+@router.get("/api/scheduler")
+async def get_scheduler(
+    request: Request, date: str = Query(...), type: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID),
+    db: AsyncSession = Depends(get_async_db),
+):
+    day = parse_date(date)
+    return await _cached(request, "scheduler", site_id, {"date": date, "type": type}, [day], db, listings.scheduler_view, day)
+
+@router.get("/api/reports")
+async def get_reports(
+    request: Request, type: str = Query(...), date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID),
+    db: AsyncSession = Depends(get_async_db),
+):
+    day = parse_date(date)
+    return await _cached(
+        request, "reports", site_id, {"type": type, "date": date}, reports.source_dates(type, day), db,
+        snapshots.get_or_build, type, day,
+    )
+
+@router.get("/api/forecast/no-shows")
+async def get_no_show_forecast(date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID), db: AsyncSession = Depends(get_async_db)):
+    day = parse_date(date)
+    return await db.run_sync(lambda session: {
+        "days": forecasting.week_forecast(session, day, site_id),
+        "overbook": forecasting.overbook_candidates(session, day, site_id=site_id),
+    })
+
+@router.get("/api/staff/productivity", response_class=ORJSONResponse)
+async def get_staff_productivity(
+    start_date: str = Query(...), end_date: str = Query(...), site_id: int = Query(DEFAULT_SITE_ID),
+    db: AsyncSession = Depends(get_async_db),
+):
+    first_day, last_day = parse_date(start_date), parse_date(end_date)
+    try:
+        rows = await db.run_sync(listings.productivity, first_day, last_day, site_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return ORJSONResponse({"employees": rows})
+
+@router.get("/api/cache/stats")
+async def get_cache_stats():
+    return response_cache.stats()
@@ -0,0 +1,65 @@
+# Server-sent events for the scheduler view: an initial snapshot for a date,
+# then batches of appointment changes as the booking endpoints commit them.
+# The snapshot is listings.scheduler_view, whose appointments have the same shape
+# and ids as the changes, so the client can merge them by id.
+
+import json
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.pubsub import broker, schedule_channel
+from app.api.analytics import parse_date
+from app.models.base import DEFAULT_SITE_ID
+from app.services import listings
+
+router = APIRouter()
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def load_schedule(day, site_id):
+    # One short-lived session on whichever engine the app runs on
+    if settings.ASYNC_DB:
+        from app.core.database_async import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(listings.scheduler_view, day, site_id)
+    db = SessionLocal()
+    try:
+        return await run_in_threadpool(listings.scheduler_view, db, day, site_id)
+    finally:
+        db.close()
+
+async def feed(day, snapshot, subscription):
+    try:
+        yield sse("snapshot", {"date": day.isoformat(), **snapshot})
+        while True:
+            batch = await subscription.next_batch(settings.FEED_HEARTBEAT_SECONDS, settings.FEED_COALESCE_MS / 1000)
+            if batch is None:
+                yield ": ping\n\n"
+                continue
+            messages, overflowed = batch
+            if overflowed or any(kind == "resync" for kind, _ in messages):
+                # Too far behind, or bulk changes: the client refetches the snapshot
+                yield sse("resync", {"date": day.isoformat()})
+                continue
+            # Each appointment arrives already encoded; join them into one array
+            yield f"event: appointments\ndata: [{','.join(data for _, data in messages)}]\n\n"
+    finally:
+        subscription.close()
+
+@router.get("/api/scheduler/stream")
+async def stream_scheduler(date: str = Query(...), type: str = Query(None), site_id: int = Query(DEFAULT_SITE_ID)):
+    day = parse_date(date)
+    # Subscribe before the snapshot is built so no change falls between the two
+    subscription = broker.subscribe(schedule_channel(day, site_id))
+    try:
+        snapshot = await load_schedule(day, site_id)
+    except BaseException:
+        subscription.close()
+        raise
+    return StreamingResponse(
+        feed(day, snapshot, subscription), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
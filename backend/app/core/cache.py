@@ -0,0 +1,154 @@
+# Response cache for the polled dashboard/report endpoints.
+# Entries are keyed on endpoint + params + site + the version counters of the
+# site's dates the response depends on; a booking bumps the counter of its site
+# and date, so only that site's responses covering that date miss afterwards.
+# Stale versions age out through LRU/TTL.
+
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from fastapi import Response
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.base import DEFAULT_SITE_ID
+
+class MemoryBackend:
+    # In-process LRU with per-entry TTL
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.date_versions = Counter()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def versions(self, dates):
+        with self.lock:
+            return [self.date_versions[d] for d in dates]
+
+    def bump(self, dates):
+        with self.lock:
+            for d in dates:
+                self.date_versions[d] += 1
+
+    def stats(self):
+        return {"size": len(self.entries), "evictions": self.evictions}
+
+class RedisBackend:
+    # Shared across workers; eviction is left to Redis' maxmemory policy
+    def __init__(self, url, ttl):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        data = self.client.get(f"cache:response:{key}")
+        if data is None:
+            return None
+        etag, _, body = data.partition(b"\n")
+        return etag.decode(), body
+
+    def set(self, key, value):
+        etag, body = value
+        self.client.set(f"cache:response:{key}", etag.encode() + b"\n" + body, ex=self.ttl)
+
+    def versions(self, dates):
+        return [int(v or 0) for v in self.client.mget([f"cache:version:{d}" for d in dates])]
+
+    def bump(self, dates):
+        pipe = self.client.pipeline()
+        for d in dates:
+            pipe.incr(f"cache:version:{d}")
+        pipe.execute()
+
+    def stats(self):
+        info = self.client.info("stats")
+        return {"size": None, "evictions": info.get("evicted_keys", 0)}
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _version_names(self, dates, site_id):
+        return [f"{site_id}:{d.isoformat()}" for d in dates]
+
+    def key(self, endpoint, params, dates, site_id=DEFAULT_SITE_ID):
+        versions = self.backend.versions(self._version_names(dates, site_id))
+        parts = [endpoint, f"site={site_id}"] + [f"{k}={params[k]}" for k in sorted(params)]
+        parts.append("v=" + ".".join(map(str, versions)))
+        return "|".join(parts)
+
+    def lookup(self, endpoint, params, dates, site_id=DEFAULT_SITE_ID):
+        key = self.key(endpoint, params, dates, site_id)
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key, entry
+
+    def store(self, key, payload):
+        body = dumps(payload)
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        entry = (etag, body)
+        self.backend.set(key, entry)
+        return entry
+
+    def respond(self, request, entry):
+        etag, body = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def cached(self, request, endpoint, params, dates, build, site_id=DEFAULT_SITE_ID):
+        key, entry = self.lookup(endpoint, params, dates, site_id)
+        if entry is None:
+            entry = self.store(key, build())
+        return self.respond(request, entry)
+
+    def invalidate_dates(self, dates, site_id=DEFAULT_SITE_ID):
+        self.backend.bump(self._version_names(dates, site_id))
+        self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            **self.backend.stats(),
+        }
+
+def _create_cache():
+    if settings.CACHE_BACKEND == "redis":
+        return ResponseCache(RedisBackend(settings.REDIS_URL, settings.CACHE_TTL_SECONDS))
+    return ResponseCache(MemoryBackend(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS))
+
+response_cache = _create_cache()
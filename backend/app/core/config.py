@@ -3,15 +3,53 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     DATABASE_URL: str
     DB_BACKEND: str  # <-- Add this line
+    ASYNC_DB: bool = False  # serve booking/analytics routes from the async engine
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # seconds; below typical managed-Postgres idle timeouts
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 disables
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_BACKEND: str = "memory"  # or "redis" to share cached responses across workers
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 2048
+    PUBSUB_BACKEND: str = "memory"  # or "redis" to fan schedule changes out across workers
+    FEED_MAX_PENDING: int = 256  # buffered changes per feed client before it is told to resync
+    FEED_COALESCE_MS: int = 50
+    FEED_HEARTBEAT_SECONDS: int = 15
+    METRICS_ENABLED: bool = True  # latency/query histograms and scheduler timers on /metrics
+    PROFILING_ENABLED: bool = False  # allow X-Profile requests to return a sampled profile
+    PROFILE_INTERVAL_MS: float = 1.0
     SECRET_KEY: str
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+class EmailSettings(BaseSettings):
+    # Only the processes that send mail need these; see get_email_settings()
     SMTP_SERVER: str
     SMTP_PORT: int
     SMTP_USERNAME: str
     SMTP_PASSWORD: str
     EMAIL_FROM: str
     EMAIL_TO: str
+    SMTP_START_TLS: bool = True
+    EMAIL_BATCH_SIZE: int = 50  # messages per delivery task / SMTP connection
+    EMAIL_MAX_RETRIES: int = 3
 
     class Config:
         env_file = ".env"
+        extra = "ignore"
+
+settings = Settings()
+_email_settings = None
 
-settings = Settings()
\ No newline at end of file
+def get_email_settings():
+    # Read on first use, so the API and non-email workers boot without SMTP config
+    global _email_settings
+    if _email_settings is None:
+        _email_settings = EmailSettings()
+    return _email_settings
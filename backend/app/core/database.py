@@ -1,8 +1,67 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The one engine factory for the app: every module shares this Base and the
+# lazily created engine, whichever DB_BACKEND is configured.
 Base = declarative_base()
+_engine = None
+_SessionFactory = sessionmaker(autocommit=False, autoflush=False)
+
+def is_sqlite(url):
+    return url.startswith("sqlite")
+
+def engine_options(url, async_driver=False):
+    # create_engine kwargs for the configured backend and pool settings
+    if is_sqlite(url):
+        options = {"connect_args": {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if not async_driver:
+            options["connect_args"]["check_same_thread"] = False
+        return options
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        if async_driver:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the booking writer; NORMAL sync is durable
+    # enough in WAL mode and avoids an fsync per commit
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+def create_db_engine(url=None):
+    url = url or settings.DATABASE_URL
+    engine = create_engine(url, **engine_options(url))
+    if is_sqlite(url):
+        event.listen(engine, "connect", configure_sqlite)
+    return engine
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine()
+        _SessionFactory.configure(bind=_engine)
+    return _engine
+
+def SessionLocal():
+    # Called like a sessionmaker; creates the engine on first use
+    get_engine()
+    return _SessionFactory()
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
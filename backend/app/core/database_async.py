@@ -0,0 +1,37 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.core.config import settings
+from app.core.database import configure_sqlite, engine_options, is_sqlite
+
+# Async engine for the ASYNC_DB routes: aiosqlite locally, asyncpg for Postgres.
+# Shares pool settings and SQLite pragmas with the sync engine in app.core.database.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+}
+_async_engine = None
+_AsyncSessionFactory = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+def async_database_url(url, backend):
+    driver = ASYNC_DRIVERS["sqlite" if backend == "sqlite" else "postgres"]
+    return driver + url[url.index(":"):]
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(settings.DATABASE_URL, settings.DB_BACKEND),
+            **engine_options(settings.DATABASE_URL, async_driver=True),
+        )
+        if is_sqlite(settings.DATABASE_URL):
+            event.listen(_async_engine.sync_engine, "connect", configure_sqlite)
+        _AsyncSessionFactory.configure(bind=_async_engine)
+    return _async_engine
+
+def AsyncSessionLocal():
+    get_async_engine()
+    return _AsyncSessionFactory()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,154 @@
+# Compact in-memory schedules for the scheduler hot path. A day's bookings are
+# parallel typed arrays: therapist and room ids are the Employee.id / Room.id
+# integers and times are minutes from the day's midnight, so one booking costs
+# 12 bytes of array storage instead of a dict with string keys and datetimes.
+# Scans use NumPy views over the same buffers without copying; NumPy is imported
+# by the methods that use it, so the API starts without it.
+
+from array import array
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from sqlalchemy import or_
+from app.models.base import Appointment, holds_slot
+
+MINUTES_PER_DAY = 24 * 60
+
+def minute_of(moment, day):
+    # Minutes from `day`'s midnight; negative or > MINUTES_PER_DAY off that day
+    return int((moment - datetime.combine(day, time())) // timedelta(minutes=1))
+
+def at_minute(day, minute):
+    return datetime.combine(day, time()) + timedelta(minutes=minute)
+
+class DaySchedule:
+    __slots__ = ("day", "therapist_ids", "room_ids", "starts", "ends")
+
+    def __init__(self, day):
+        self.day = day
+        self.therapist_ids = array("i")
+        self.room_ids = array("i")
+        self.starts = array("H")
+        self.ends = array("H")
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.therapist_ids, self.room_ids, self.starts, self.ends))
+
+    def add(self, therapist_id, room_id, start, end):
+        # start/end in minutes; clipped to this day so bookings across midnight fit
+        self.therapist_ids.append(therapist_id or 0)
+        self.room_ids.append(room_id or 0)
+        self.starts.append(max(start, 0))
+        self.ends.append(min(end, MINUTES_PER_DAY))
+
+    def add_booking(self, therapist_id, room_id, start_time, end_time):
+        self.add(therapist_id, room_id, minute_of(start_time, self.day), minute_of(end_time, self.day))
+
+    def columns(self):
+        # Zero-copy NumPy views: (therapist_ids, room_ids, starts, ends)
+        import numpy as np
+        if not len(self):
+            return np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.uint16), np.zeros(0, np.uint16)
+        return (
+            np.frombuffer(self.therapist_ids, dtype=np.int32),
+            np.frombuffer(self.room_ids, dtype=np.int32),
+            np.frombuffer(self.starts, dtype=np.uint16),
+            np.frombuffer(self.ends, dtype=np.uint16),
+        )
+
+    def is_free(self, therapist_id, room_id, start, end):
+        import numpy as np
+        therapists, rooms, starts, ends = self.columns()
+        overlap = (starts < end) & (ends > start)
+        return not bool(np.any(overlap & ((therapists == therapist_id) | (rooms == room_id))))
+
+    def busy_by(self):
+        # ({therapist_id: [(start, end), ...]}, {room_id: [...]}) in one pass, sorted by start
+        by_therapist = defaultdict(list)
+        by_room = defaultdict(list)
+        for i in sorted(range(len(self)), key=self.starts.__getitem__):
+            interval = (self.starts[i], self.ends[i])
+            by_therapist[self.therapist_ids[i]].append(interval)
+            by_room[self.room_ids[i]].append(interval)
+        return by_therapist, by_room
+
+    def to_dicts(self):
+        # The scheduler's legacy dict format, with ids in place of names
+        return [
+            {"slot": at_minute(self.day, s), "therapist": t, "room": r}
+            for t, r, s in zip(self.therapist_ids, self.room_ids, self.starts)
+        ]
+
+class ScheduleWindow:
+    # DaySchedules for a run of days, loaded with one range query
+    __slots__ = ("days",)
+
+    def __init__(self):
+        self.days = {}
+
+    def __getitem__(self, day):
+        schedule = self.days.get(day)
+        if schedule is None:
+            schedule = self.days[day] = DaySchedule(day)
+        return schedule
+
+    def __len__(self):
+        return sum(len(schedule) for schedule in self.days.values())
+
+    @property
+    def nbytes(self):
+        return sum(schedule.nbytes for schedule in self.days.values())
+
+    def add_booking(self, therapist_id, room_id, start_time, end_time):
+        # A booking is stored under every day it touches
+        day = start_time.date()
+        last_day = max(day, (end_time - timedelta(microseconds=1)).date())
+        while day <= last_day:
+            self[day].add_booking(therapist_id, room_id, start_time, end_time)
+            day += timedelta(days=1)
+
+    @classmethod
+    def from_rows(cls, rows):
+        # rows: ORM Appointments or (therapist_id, room_id, start_time, end_time) tuples.
+        # Same-day bookings (nearly all of them) take an inlined path that skips
+        # the timedelta arithmetic; this loop dominates load() on large windows.
+        window = cls()
+        days = window.days
+        for row in rows:
+            if isinstance(row, Appointment):
+                row = (row.therapist_id, row.room_id, row.start_time, row.end_time)
+            therapist_id, room_id, start, end = row
+            day = start.date()
+            if end.date() != day:
+                window.add_booking(therapist_id, room_id, start, end)
+                continue
+            schedule = days.get(day)
+            if schedule is None:
+                schedule = days[day] = DaySchedule(day)
+            schedule.therapist_ids.append(therapist_id or 0)
+            schedule.room_ids.append(room_id or 0)
+            schedule.starts.append(start.hour * 60 + start.minute)
+            schedule.ends.append(end.hour * 60 + end.minute)
+        return window
+
+    @classmethod
+    def load(cls, db, window_start, window_end, therapist_ids=None, room_ids=None):
+        # Bookings overlapping [window_start, window_end), optionally only those of
+        # the given therapists or rooms. No booking spans more than a day, which
+        # bounds the index range scan on start_time.
+        query = db.query(
+            Appointment.therapist_id, Appointment.room_id, Appointment.start_time, Appointment.end_time
+        ).filter(
+            Appointment.start_time > window_start - timedelta(days=1),
+            Appointment.start_time < window_end,
+            Appointment.end_time > window_start,
+            holds_slot(),
+        )
+        if therapist_ids is not None or room_ids is not None:
+            query = query.filter(or_(
+                Appointment.therapist_id.in_(therapist_ids or []), Appointment.room_id.in_(room_ids or []),
+            ))
+        return cls.from_rows(query.all())
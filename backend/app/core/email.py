@@ -1,19 +1,119 @@
-# Placeholder for email sending logic
+# Email delivery.
+# send_email() is a one-off send on its own connection. Workers use get_mailer():
+# one long-lived event loop and one reused SMTP connection per process, so a batch
+# pays for connect + STARTTLS + login once, with retry and backoff per message.
+import asyncio
+import os
 import aiosmtplib
 from email.message import EmailMessage
-from app.core.config import settings
+from app.core.config import get_email_settings
 
-async def send_email(subject: str, body: str, to: str = None):
+# Worth reconnecting and retrying; anything else (e.g. a refused recipient) is permanent
+TRANSIENT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+)
+
+def build_message(subject: str, body: str, to: str = None, attachments=()):
+    settings = get_email_settings()
     msg = EmailMessage()
     msg["From"] = settings.EMAIL_FROM
     msg["To"] = to or settings.EMAIL_TO
     msg["Subject"] = subject
     msg.set_content(body)
+    for filename, content, mime_type in attachments:
+        maintype, subtype = mime_type.split("/", 1)
+        if isinstance(content, str) and maintype != "text":
+            content = content.encode()
+        msg.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
+    return msg
+
+async def send_email(subject: str, body: str, to: str = None):
+    settings = get_email_settings()
     await aiosmtplib.send(
-        msg,
+        build_message(subject, body, to),
         hostname=settings.SMTP_SERVER,
         port=settings.SMTP_PORT,
         username=settings.SMTP_USERNAME,
         password=settings.SMTP_PASSWORD,
-        start_tls=True,
+        start_tls=settings.SMTP_START_TLS,
     )
+
+class Mailer:
+    def __init__(self, hostname, port, username=None, password=None, start_tls=True, max_retries=3, backoff=1.0):
+        self.options = {"hostname": hostname, "port": port, "username": username, "password": password, "start_tls": start_tls}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.loop = asyncio.new_event_loop()
+        self.smtp = None
+
+    async def _connection(self):
+        if self.smtp is None or not self.smtp.is_connected:
+            self.smtp = aiosmtplib.SMTP(**self.options)
+            await self.smtp.connect()
+        return self.smtp
+
+    async def _drop_connection(self):
+        smtp, self.smtp = self.smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+    async def _deliver(self, message):
+        # Returns None when sent, otherwise the final error message
+        for attempt in range(self.max_retries + 1):
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(message)
+                return None
+            except aiosmtplib.SMTPResponseException as exc:
+                # 4xx (e.g. 421 rate limited) is temporary; 5xx is final
+                if exc.code >= 500:
+                    return str(exc)
+                error = exc
+                await self._drop_connection()
+            except TRANSIENT_ERRORS as exc:
+                error = exc
+                await self._drop_connection()
+            except aiosmtplib.SMTPException as exc:
+                return str(exc)
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        return str(error)
+
+    async def _send_batch(self, messages):
+        failed = []
+        for message in messages:
+            error = await self._deliver(message)
+            if error:
+                failed.append({"to": message["To"], "error": error})
+        return failed
+
+    def send_batch(self, messages):
+        # Send messages over the pooled connection; returns counts and per-recipient failures
+        failed = self.loop.run_until_complete(self._send_batch(messages))
+        return {"sent": len(messages) - len(failed), "failed": failed}
+
+    def close(self):
+        self.loop.run_until_complete(self._drop_connection())
+        self.loop.close()
+
+_mailer = None
+_mailer_pid = None
+
+def get_mailer():
+    # One Mailer per process: a Celery prefork child must not reuse its parent's loop or socket
+    global _mailer, _mailer_pid
+    if _mailer is None or _mailer_pid != os.getpid():
+        settings = get_email_settings()
+        _mailer = Mailer(
+            settings.SMTP_SERVER, settings.SMTP_PORT,
+            username=settings.SMTP_USERNAME, password=settings.SMTP_PASSWORD,
+            start_tls=settings.SMTP_START_TLS, max_retries=settings.EMAIL_MAX_RETRIES,
+        )
+        _mailer_pid = os.getpid()
+    return _mailer
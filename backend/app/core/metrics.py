@@ -0,0 +1,253 @@
+# Request and hot-path instrumentation: per-route latency histograms, SQL query
+# count and DB time per request (from SQLAlchemy cursor events), scheduler phase
+# timers, Prometheus text exposition for /metrics, and an opt-in sampling
+# profiler for single requests sent with the X-Profile header.
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+PHASE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+PROFILE_HEADER = b"x-profile"
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Registry:
+    # Histograms and counters keyed by (metric name, label tuple)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = Counter()
+        self.meta = {}
+
+    def describe(self, name, kind, help_text):
+        self.meta[name] = (kind, help_text)
+
+    def observe(self, name, labels, value, buckets):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def render(self):
+        # Prometheus text format 0.0.4
+        with self.lock:
+            histograms = sorted(
+                (key, list(h.counts), h.sum, h.count, h.buckets) for key, h in self.histograms.items()
+            )
+            counters = sorted(self.counters.items())
+        lines = []
+        described = set()
+
+        def header(name):
+            if name not in described and name in self.meta:
+                kind, help_text = self.meta[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+        for (name, labels), counts, total, count, buckets in histograms:
+            header(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+registry = Registry()
+registry.describe("http_request_duration_seconds", "histogram", "Request latency by route template")
+registry.describe("http_request_db_queries", "histogram", "SQL statements executed per request")
+registry.describe("http_request_db_seconds_total", "counter", "Time spent in SQL statements")
+registry.describe("scheduler_phase_duration_seconds", "histogram", "Scheduler phase wall time")
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+# Set by the middleware; the cursor hooks are no-ops outside a request. The
+# stats object is shared by reference, so threadpool routes and run_sync
+# greenlets (which run in a copy of the context) update the request's counters.
+_request_stats = ContextVar("request_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is not None and starts:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - starts.pop()
+
+def install_sqlalchemy_hooks():
+    # Class-level listeners cover every engine, including the async engines' sync_engine
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+@contextmanager
+def phase(name):
+    # Times one scheduler phase into scheduler_phase_duration_seconds{phase=name}
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("scheduler_phase_duration_seconds", (("phase", name),), time.perf_counter() - start, PHASE_BUCKETS)
+
+class SamplingProfiler:
+    # Samples the stacks of every other thread each interval and counts them in
+    # collapsed "outer;...;inner count" form (input for flamegraph.pl/speedscope).
+    # Only stacks that pass through this package are kept, which drops idle
+    # workers and the event loop's selector wait. Concurrent requests can show up
+    # in the same profile; it is meant for one-off investigation.
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.done.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(APP_DIR)
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if in_app:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+class MetricsMiddleware:
+    # Plain ASGI middleware (no BaseHTTPMiddleware task/queue per request) so the
+    # per-request cost stays in the tens of microseconds and streaming responses
+    # are passed through untouched.
+    def __init__(self, app):
+        self.app = app
+        install_sqlalchemy_hooks()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if settings.PROFILING_ENABLED and any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            await self._profile(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", app;dur={(time.perf_counter() - start) * 1000:.2f}'
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (("method", scope["method"]), ("route", route))
+            registry.observe("http_request_duration_seconds", labels + (("status", status),), elapsed, LATENCY_BUCKETS)
+            registry.observe("http_request_db_queries", labels, stats.queries, QUERY_COUNT_BUCKETS)
+            registry.inc("http_request_db_seconds_total", labels, stats.db_time)
+
+    async def _profile(self, scope, receive, send):
+        # Runs the request under the sampler and answers with the collapsed stacks
+        # instead of the route's own response body
+        status = 500
+
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with SamplingProfiler(settings.PROFILE_INTERVAL_MS / 1000) as profiler:
+                await self.app(scope, receive, capture)
+        finally:
+            _request_stats.reset(token)
+        elapsed = time.perf_counter() - start
+        body = (
+            f"# {scope['method']} {scope['path']} -> {status} in {elapsed * 1000:.1f}ms, "
+            f"{stats.queries} queries / {stats.db_time * 1000:.1f}ms DB, {profiler.samples} samples\n"
+            + profiler.collapsed() + "\n"
+        ).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,95 @@
+# Monthly range partitions of the appointments table on Postgres. The parent is
+# declared PARTITION BY RANGE (start_time) in app/models/base.py. Queries bounded
+# by date only scan the months they cover, and old months can be detached whole.
+# Exclusion constraints cannot be declared on a partitioned parent, so every
+# partition gets its own room and therapist no-overlap constraints, which skip
+# cancelled and no-show rows like the conflict query does. A booking
+# that crosses midnight into the next month is therefore only race-checked in
+# its own month; the booking code's conflict query still covers it. Rows
+# outside the created months would go to the DEFAULT partition, and a month
+# cannot be created while the default partition holds rows in its range, so
+# every writer creates the months it writes first: bookings and recurring
+# series their start months, bulk imports the months they load.
+# ensure_partitions_task keeps MONTHS_AHEAD months ready ahead of them.
+# Everything here is a no-op on other databases.
+
+from datetime import date, timedelta
+from sqlalchemy import text
+
+TABLE = "appointments"
+MONTHS_AHEAD = 3
+# Resource name (as reported by BookingConflict) -> column
+EXCLUSIONS = {"room": "room_id", "therapist": "therapist_id"}
+# Months seen to exist, so bookings into them skip the catalog lookup. Only
+# months read from the catalog are added: one created by this transaction is
+# gone again if the transaction rolls back.
+_existing_months = set()
+
+def next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def partition_name(month):
+    return f"{TABLE}_{month:%Y_%m}"
+
+def constraint_resource(name):
+    # "room"/"therapist" for a partition's no-overlap constraint name, else None
+    for resource in EXCLUSIONS:
+        if name and name.startswith(f"{TABLE}_") and name.endswith(f"_{resource}_no_overlap"):
+            return resource
+    return None
+
+def _add_exclusions(connection, name):
+    # Imported here: app.models.base imports this module
+    from app.models.base import RELEASED_STATUSES
+    released = ", ".join(f"'{status}'" for status in RELEASED_STATUSES)
+    for resource, column in EXCLUSIONS.items():
+        connection.exec_driver_sql(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_{resource}_no_overlap "
+            f"EXCLUDE USING gist ({column} WITH =, tsrange(start_time, end_time) WITH &&) "
+            f"WHERE (status IS NULL OR status NOT IN ({released}))"
+        )
+
+def create_default_partition(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    name = f"{TABLE}_default"
+    connection.exec_driver_sql(f"CREATE TABLE {name} PARTITION OF {TABLE} DEFAULT")
+    _add_exclusions(connection, name)
+
+def ensure_partitions(connection, first_day=None, last_day=None):
+    # Create the missing monthly partitions covering [first_day, last_day]
+    # (default: this month through MONTHS_AHEAD months ahead). Returns the names created.
+    if connection.dialect.name != "postgresql":
+        return []
+    month = (first_day or date.today()).replace(day=1)
+    if last_day is None:
+        last_day = month
+        for _ in range(MONTHS_AHEAD):
+            last_day = next_month(last_day)
+    months = []
+    while month <= last_day:
+        months.append(month)
+        month = next_month(month)
+    if _existing_months.issuperset(months):
+        return []
+    # Serialize concurrent callers (the beat task and bulk imports) for this transaction
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": TABLE})
+    existing = {name for (name,) in connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = :table"
+    ), {"table": TABLE})}
+    created = []
+    for month in months:
+        name = partition_name(month)
+        if name in existing:
+            _existing_months.add(month)
+            continue
+        connection.exec_driver_sql(
+            f"CREATE TABLE {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        )
+        _add_exclusions(connection, name)
+        created.append(name)
+    return created
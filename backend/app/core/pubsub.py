@@ -0,0 +1,139 @@
+# Fan-out for the schedule change feed. Booking code publishes from any thread
+# (threadpool routes, run_sync greenlets, Celery); each SSE client holds a
+# Subscription on its event loop. Messages are handed to each loop with one
+# call_soon_threadsafe per publish, buffered per subscriber up to a bound, and
+# drained in batches so a burst of bookings reaches a client as one event.
+# A subscriber that falls behind is flagged to resync instead of buffering
+# without limit. With PUBSUB_BACKEND=redis, publishes go through Redis pub/sub
+# so every worker's subscribers see bookings made on any worker.
+# Messages are {"type": ..., "data": ...}; data is JSON-encoded once per publish,
+# not once per subscriber.
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from app.core.config import settings
+from app.models.base import DEFAULT_SITE_ID
+
+def schedule_channel(day, site_id=DEFAULT_SITE_ID):
+    return f"schedule:{site_id}:{day.isoformat()}"
+
+class Subscription:
+    def __init__(self, broker, channel, loop, max_pending):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.max_pending = max_pending
+        self.pending = []
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def deliver(self, message):
+        # Runs on self.loop; message is (type, encoded data)
+        if self.overflowed:
+            return
+        if len(self.pending) >= self.max_pending:
+            self.pending = []
+            self.overflowed = True
+        else:
+            self.pending.append(message)
+        self.ready.set()
+
+    async def next_batch(self, timeout, coalesce=0.0):
+        # ([(type, encoded data), ...], overflowed), or None if nothing arrived within timeout
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if coalesce:
+            # Let the rest of a burst land before draining
+            await asyncio.sleep(coalesce)
+        self.ready.clear()
+        batch, overflowed = self.pending, self.overflowed
+        self.pending, self.overflowed = [], False
+        return batch, overflowed
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+def _deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+class MemoryBroker:
+    # Subscribers of this process only
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, asyncio.get_running_loop(), self.max_pending)
+        with self.lock:
+            self.channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.channels[subscription.channel]
+
+    def publish(self, channel, message):
+        self.dispatch(channel, message)
+
+    def dispatch(self, channel, message):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        if not subscribers:
+            return
+        message = (message["type"], json.dumps(message.get("data"), default=str))
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, subscriptions, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+
+class RedisBroker(MemoryBroker):
+    # Publishes through Redis; one listener thread per process dispatches to
+    # the local subscribers
+    PREFIX = "feed:"
+
+    def __init__(self, url, max_pending):
+        super().__init__(max_pending)
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.listener = None
+
+    def subscribe(self, channel):
+        if self.listener is None:
+            with self.lock:
+                if self.listener is None:
+                    self.listener = threading.Thread(target=self._listen, daemon=True)
+                    self.listener.start()
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        self.client.publish(self.PREFIX + channel, json.dumps(message, default=str))
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self.PREFIX + "*")
+        for item in pubsub.listen():
+            channel = item["channel"].decode()[len(self.PREFIX):]
+            self.dispatch(channel, json.loads(item["data"]))
+
+def _create_broker():
+    if settings.PUBSUB_BACKEND == "redis":
+        return RedisBroker(settings.REDIS_URL, settings.FEED_MAX_PENDING)
+    return MemoryBroker(settings.FEED_MAX_PENDING)
+
+broker = _create_broker()
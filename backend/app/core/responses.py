@@ -0,0 +1,18 @@
+# orjson serialization for the JSON payloads the API builds itself (listings,
+# cached reports). Dicts, lists, datetimes, dates, enums and numpy values are
+# encoded natively; anything else goes through FastAPI's jsonable_encoder.
+
+import orjson
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def dumps(payload):
+    return orjson.dumps(payload, default=jsonable_encoder, option=OPTIONS)
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
@@ -1,20 +1,43 @@
 # Hybrid Smart Scheduler: Heuristic + Convex Optimization (LP)
 # This is a backend module for slot suggestion with constraints
 
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-import pulp
+from fractions import Fraction
+from sqlalchemy import or_
+from app.core import metrics
+from app.models.base import Appointment, holds_slot
 
 # Example data structures (replace with real DB queries in production)
 # appointments: list of dicts with keys: slot, therapist, room
-# therapists: list of therapist names
-# rooms: list of room names
+# therapists: list of therapist (employee) ids
+# rooms: list of room ids
+# rules: the site's booking rules as resolved by sites.scheduler_rules(), by id:
+#   "shared_rooms": {room: {therapist: share}} - only the listed therapists book
+#       the room, each while their share of its bookings is below `share`
+#   "max_rooms": {therapist: n} - the therapist works in at most n rooms; shared
+#       rooms are neither limited nor counted
+# e.g. {"shared_rooms": {7: {9: 0.7, 1: 0.3}}, "max_rooms": {1: 3, 2: 3}}
+
+def _shares(rules, room):
+    # {therapist: share} if `room` is a shared room, else None
+    return (rules or {}).get("shared_rooms", {}).get(room)
+
+def _limited_rooms(rules, rooms):
+    # The rooms that count toward max_rooms: every room but the shared ones
+    return {room for room in rooms if _shares(rules, room) is None}
+
+def _max_rooms(rules, therapist):
+    # Most rooms `therapist` may work in, or None if unlimited
+    return (rules or {}).get("max_rooms", {}).get(therapist)
 
 def generate_timeslots(date_str, start_hour=8, end_hour=18, slot_minutes=30):
-    date = datetime.strptime(date_str, "%Y-%m-%d")
-    slots = []
-    for h in range(start_hour, end_hour):
-        for m in range(0, 60, slot_minutes):
-            slots.append(date.replace(hour=h, minute=m))
+    with metrics.phase("timeslots"):
+        date = datetime.strptime(date_str, "%Y-%m-%d")
+        slots = []
+        for h in range(start_hour, end_hour):
+            for m in range(0, 60, slot_minutes):
+                slots.append(date.replace(hour=h, minute=m))
     return slots
 
 def is_available(slot, therapist, room, appointments):
@@ -29,39 +52,321 @@ def count_appointments(therapist, room, appointments):
         if (therapist is None or appt['therapist'] == therapist) and appt['room'] == room
     )
 
-def check_constraints(slot, request, appointments, therapists, rooms):
-    # Joe's Room constraint
-    if request['room'] == "Joe's Room [A]":
-        if request['therapist'] == "Joe":
-            joe_bookings = count_appointments("Joe", "Joe's Room [A]", appointments)
-            total_bookings = count_appointments(None, "Joe's Room [A]", appointments)
-            if total_bookings == 0 or joe_bookings / total_bookings < 0.7:
-                return True
-        elif request['therapist'] in ["Junior1", "Junior2"]:
-            junior_bookings = count_appointments(request['therapist'], "Joe's Room [A]", appointments)
-            total_bookings = count_appointments(None, "Joe's Room [A]", appointments)
-            if total_bookings == 0 or junior_bookings / total_bookings < 0.3:
+def check_constraints(slot, request, appointments, therapists, rooms, rules=None):
+    # Shared room constraint
+    shares = _shares(rules, request['room'])
+    if shares is not None:
+        if request['therapist'] in shares:
+            therapist_bookings = count_appointments(request['therapist'], request['room'], appointments)
+            total_bookings = count_appointments(None, request['room'], appointments)
+            if total_bookings == 0 or therapist_bookings / total_bookings < shares[request['therapist']]:
                 return True
         return False
-    # Junior can work in up to 3 rooms
-    if request['therapist'].startswith("Junior"):
-        rooms_worked = set(appt['room'] for appt in appointments if appt['therapist'] == request['therapist'])
-        if len(rooms_worked) >= 3 and request['room'] not in rooms_worked:
+    # Room limit
+    limit = _max_rooms(rules, request['therapist'])
+    if limit is not None:
+        rooms_worked = _limited_rooms(rules, (appt['room'] for appt in appointments if appt['therapist'] == request['therapist']))
+        if len(rooms_worked) >= limit and request['room'] not in rooms_worked:
             return False
     return True
 
-def suggest_slots(appointments, therapists, rooms, request):
+class OccupancyIndex:
+    # Slot-keyed occupancy sets plus running booking counters. Availability and
+    # the room ratio checks are O(1) lookups, but building the index is one O(n)
+    # pass, so only an index kept warm with add/remove answers in time that does
+    # not grow with the number of bookings. With `day`
+    # (a datetime at midnight) only that day's slots are indexed, so availability
+    # is only answered for that day; the counters still cover every appointment.
+    def __init__(self, appointments=(), rules=None, day=None):
+        self.rules = rules or {}
+        booked = appointments
+        if day is not None:
+            day_end = day + timedelta(days=1)
+            booked = [appt for appt in appointments if day <= appt['slot'] < day_end]
+        self.therapist_slots = {(appt['therapist'], appt['slot']) for appt in booked}
+        self.room_slots = {(appt['room'], appt['slot']) for appt in booked}
+        self.pair_counts = Counter((appt['therapist'], appt['room']) for appt in appointments)
+        self.room_counts = Counter()
+        self.therapist_rooms = defaultdict(Counter)
+        for (therapist, room), count in self.pair_counts.items():
+            self.room_counts[room] += count
+            self.therapist_rooms[therapist][room] = count
+
+    def add(self, appt):
+        therapist, room = appt['therapist'], appt['room']
+        self.therapist_slots.add((therapist, appt['slot']))
+        self.room_slots.add((room, appt['slot']))
+        self.pair_counts[therapist, room] += 1
+        self.room_counts[room] += 1
+        self.therapist_rooms[therapist][room] += 1
+
+    def remove(self, appt):
+        therapist, room = appt['therapist'], appt['room']
+        self.therapist_slots.discard((therapist, appt['slot']))
+        self.room_slots.discard((room, appt['slot']))
+        self.pair_counts[therapist, room] -= 1
+        self.room_counts[room] -= 1
+        worked = self.therapist_rooms[therapist]
+        worked[room] -= 1
+        if worked[room] <= 0:
+            del worked[room]
+
+    def is_available(self, slot, therapist, room):
+        return (therapist, slot) not in self.therapist_slots and (room, slot) not in self.room_slots
+
+    def count_appointments(self, therapist, room):
+        if therapist is None:
+            return self.room_counts[room]
+        return self.pair_counts[therapist, room]
+
+    def check_constraints(self, request):
+        # Same rules as check_constraints(), answered from the counters
+        therapist, room = request['therapist'], request['room']
+        shares = _shares(self.rules, room)
+        if shares is not None:
+            if therapist not in shares:
+                return False
+            total_bookings = self.room_counts[room]
+            return total_bookings == 0 or self.pair_counts[therapist, room] / total_bookings < shares[therapist]
+        limit = _max_rooms(self.rules, therapist)
+        if limit is not None:
+            rooms_worked = _limited_rooms(self.rules, self.therapist_rooms[therapist])
+            if len(rooms_worked) >= limit and room not in rooms_worked:
+                return False
+        return True
+
+def suggest_slots(appointments, therapists, rooms, request, index=None, rules=None):
+    # `index` (if given) carries its own rules, and the call costs O(slots)
+    # however many appointments there are. Without one, the requested therapist's
+    # and room's appointments are picked out of `appointments` and indexed, which
+    # is a pass over every appointment: O(n), cheaper than the old per-slot scans
+    # but still growing with the list. Hot callers must keep a full index warm
+    # (add/remove on each booking) and pass it in; DB-backed callers should
+    # filter in SQL instead (see suggest_slot).
+    slots = generate_timeslots(request['date'])
+    if index is None:
+        with metrics.phase("index_build"):
+            therapist, room = request['therapist'], request['room']
+            index = OccupancyIndex(
+                [appt for appt in appointments if appt['therapist'] == therapist or appt['room'] == room],
+                rules, day=slots[0].replace(hour=0, minute=0),
+            )
+    # The room/therapist rules do not depend on the slot, so check them once
+    with metrics.phase("constraints"):
+        allowed = index.check_constraints(request)
+    if not allowed:
+        return []
     # 1. Heuristic: Find nearest empty slots
-    candidate_slots = []
-    for slot in generate_timeslots(request['date']):
-        if is_available(slot, request['therapist'], request['room'], appointments):
-            if check_constraints(slot, request, appointments, therapists, rooms):
-                candidate_slots.append(slot)
-    # 2. LP Refinement (maximize utilization, enforce ratios)
-    # For brevity, this is a placeholder. In production, set up a PuLP problem here.
+    with metrics.phase("availability"):
+        candidate_slots = [slot for slot in slots if index.is_available(slot, request['therapist'], request['room'])]
+    # 2. LP Refinement (maximize utilization, enforce ratios) runs across a whole
+    # batch of pending requests in optimize_batch(); a single request has nothing to trade off.
     # 3. Return top 4 suggestion slots
     return candidate_slots[:4]
 
+def _share_constraint(limit, count, room_total, max_total):
+    # Linear form of the sequential rule "book only while count / total < limit"
+    # (the first booking in an empty room always goes in). The last of `count`
+    # bookings saw at most total - 1 bookings, so count - 1 < limit * (total - 1)
+    # unless count <= 1. With limit = p / q, limit * (total - 1) is a multiple of
+    # 1/q, so scaling the left side by (1 + eps), eps < 1 / (q * max_total), makes
+    # the inequality strict for integers and leaves count <= 1 always feasible.
+    q = Fraction(limit).limit_denominator(1000).denominator
+    eps = 1 / (2 * q * max_total)
+    return (count - 1) * (1 + eps) <= limit * (room_total - 1)
+
+def _candidates(request, therapists, rooms):
+    therapist_choices = [request['therapist']] if request.get('therapist') else therapists
+    room_choices = [request['room']] if request.get('room') else rooms
+    return [(t, r) for t in therapist_choices for r in room_choices]
+
+def greedy_batch(requests, appointments, therapists, rooms, date_str, index=None, rules=None):
+    # Sequential heuristic: give each request the earliest slot that passes
+    # the same checks suggest_slots uses. Returns one assignment (or None) per request.
+    index = index or OccupancyIndex(appointments, rules)
+    slots = generate_timeslots(date_str)
+    with metrics.phase("greedy"):
+        return [_greedy_assign(request, index, slots, therapists, rooms) for request in requests]
+
+def _greedy_assign(request, index, slots, therapists, rooms):
+    # Earliest (slot, therapist, room) for one request; books it into the index
+    candidates = _candidates(request, therapists, rooms)
+    for slot in slots:
+        for therapist, room in candidates:
+            if index.is_available(slot, therapist, room) and index.check_constraints({'therapist': therapist, 'room': room}):
+                assignment = {'slot': slot, 'therapist': therapist, 'room': room}
+                index.add(assignment)
+                return assignment
+    return None
+
+def optimize_batch(requests, appointments, therapists, rooms, date_str, time_limit=5, max_variables=20000, rules=None):
+    # Assign N pending requests for one day in a single PuLP model over
+    # slots x therapists x rooms. Falls back to greedy_batch() when the pruned
+    # model is still too big or the solver finds nothing better.
+    index = OccupancyIndex(appointments, rules)
+    greedy = greedy_batch(requests, appointments, therapists, rooms, date_str, index=OccupancyIndex(appointments, rules))
+    slots = generate_timeslots(date_str)
+
+    # Prune: only free (slot, therapist, room) cells that can ever pass the room rules
+    variables = {}
+    with metrics.phase("prune"):
+        for i, request in enumerate(requests):
+            for therapist, room in _candidates(request, therapists, rooms):
+                shares = _shares(rules, room)
+                if shares is not None:
+                    # The split depends on the whole batch, so only the allowed therapists are pruned here
+                    if therapist not in shares:
+                        continue
+                elif not index.check_constraints({'therapist': therapist, 'room': room}):
+                    continue
+                for s, slot in enumerate(slots):
+                    if index.is_available(slot, therapist, room):
+                        variables[i, s, therapist, room] = None
+    if not variables or len(variables) > max_variables:
+        return greedy
+
+    # Imported here so the API and workers only load the LP solver when a batch needs it
+    import pulp
+    prob = pulp.LpProblem("batch_schedule", pulp.LpMaximize)
+    x = {key: pulp.LpVariable(f"x_{n}", cat="Binary") for n, key in enumerate(variables)}
+    by_request, by_therapist_slot, by_room_slot = defaultdict(list), defaultdict(list), defaultdict(list)
+    shared, by_limited_room = defaultdict(lambda: defaultdict(list)), defaultdict(list)
+    for (i, s, therapist, room), var in x.items():
+        by_request[i].append(var)
+        by_therapist_slot[therapist, s].append(var)
+        by_room_slot[room, s].append(var)
+        if _shares(rules, room) is not None:
+            shared[room][therapist].append(var)
+        elif _max_rooms(rules, therapist) is not None and room not in index.therapist_rooms[therapist]:
+            by_limited_room[therapist, room].append(var)
+
+    # Maximize booked sessions; the small earliness bonus packs the day instead of fragmenting it
+    prob += pulp.lpSum(var * (1 - s / (10 * len(slots))) for (i, s, t, r), var in x.items())
+    for group in (by_request, by_therapist_slot, by_room_slot):
+        for vars_ in group.values():
+            prob += pulp.lpSum(vars_) <= 1
+
+    # Shared room splits
+    for room, by_therapist in shared.items():
+        shares = _shares(rules, room)
+        new = [v for vars_ in by_therapist.values() for v in vars_]
+        room_total = index.room_counts[room] + pulp.lpSum(new)
+        max_total = index.room_counts[room] + len(new) + 1
+        for therapist, vars_ in by_therapist.items():
+            count = index.pair_counts[therapist, room] + pulp.lpSum(vars_)
+            prob += _share_constraint(shares[therapist], count, room_total, max_total)
+
+    # Room limits
+    new_rooms = defaultdict(list)
+    for n, ((therapist, room), vars_) in enumerate(by_limited_room.items()):
+        y = pulp.LpVariable(f"y_{n}", cat="Binary")
+        new_rooms[therapist].append(y)
+        for var in vars_:
+            prob += var <= y
+    for therapist, ys in new_rooms.items():
+        worked = _limited_rooms(rules, index.therapist_rooms[therapist])
+        prob += pulp.lpSum(ys) <= max(0, _max_rooms(rules, therapist) - len(worked))
+
+    # Warm start from the heuristic result
+    slot_pos = {slot: s for s, slot in enumerate(slots)}
+    warm = set()
+    for i, assignment in enumerate(greedy):
+        if assignment:
+            warm.add((i, slot_pos[assignment['slot']], assignment['therapist'], assignment['room']))
+    for key, var in x.items():
+        var.setInitialValue(1 if key in warm else 0)
+
+    with metrics.phase("solve"):
+        prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, warmStart=True))
+    if prob.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+        return greedy
+
+    assignments = [None] * len(requests)
+    for (i, s, therapist, room), var in x.items():
+        if var.value() is not None and var.value() > 0.5:
+            assignments[i] = {'slot': slots[s], 'therapist': therapist, 'room': room}
+    if sum(a is not None for a in assignments) < sum(a is not None for a in greedy):
+        return greedy
+    return assignments
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+def free_gaps(busy, window_start, window_end):
+    # busy must be merged and sorted; yields the free (start, end) gaps in the window
+    cursor = window_start
+    for start, end in busy:
+        if start > cursor:
+            yield cursor, min(start, window_end)
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            return
+    if cursor < window_end:
+        yield cursor, window_end
+
+def suggest_slot(payload, db, room_ids=None, start_hour=8, end_hour=18):
+    # DB-backed, duration-aware search: one range query for the therapist and the
+    # candidate rooms on the requested day, then an interval sweep per room.
+    # Returns a copy of the payload moved to the free slot closest to the requested
+    # start (preferring the requested room), or None if nothing fits.
+    duration = payload.end_time - payload.start_time
+    if duration <= timedelta(0):
+        return None
+    rooms = [payload.room_id] + [r for r in (room_ids or []) if r != payload.room_id]
+    day_start = payload.start_time.replace(hour=start_hour, minute=0, second=0, microsecond=0)
+    day_end = day_start.replace(hour=end_hour)
+    with metrics.phase("occupancy_load"):
+        rows = db.query(
+            Appointment.therapist_id, Appointment.room_id, Appointment.start_time, Appointment.end_time
+        ).filter(
+            # Lower bound on start_time keeps this an index range scan (no booking spans a day)
+            Appointment.start_time > day_start - timedelta(days=1),
+            Appointment.start_time < day_end,
+            Appointment.end_time > day_start,
+            or_(Appointment.therapist_id == payload.therapist_id, Appointment.room_id.in_(rooms)),
+            holds_slot(),
+        ).all()
+
+    therapist_busy = []
+    room_busy = {room_id: [] for room_id in rooms}
+    for therapist_id, room_id, start, end in rows:
+        if therapist_id == payload.therapist_id:
+            therapist_busy.append((start, end))
+        if room_id in room_busy:
+            room_busy[room_id].append((start, end))
+
+    found = closest_free_slot(payload.start_time, duration, therapist_busy, room_busy, rooms, day_start, day_end)
+    if found is None:
+        return None
+    start, room_id = found
+    return payload.copy(update={"room_id": room_id, "start_time": start, "end_time": start + duration})
+
+def closest_free_slot(requested_start, duration, therapist_busy, room_busy, rooms, window_start, window_end):
+    # (start, room_id) of the free slot closest to requested_start in which the
+    # therapist and one of `rooms` are both free, preferring earlier rooms on ties.
+    # room_busy maps each room to its busy intervals; None if nothing fits.
+    best = None
+    with metrics.phase("availability"):
+        for rank, room_id in enumerate(rooms):
+            busy = merge_intervals(therapist_busy + room_busy.get(room_id, []))
+            for gap_start, gap_end in free_gaps(busy, window_start, window_end):
+                if gap_end - gap_start < duration:
+                    continue
+                start = min(max(requested_start, gap_start), gap_end - duration)
+                key = (abs(start - requested_start), rank)
+                if best is None or key < best[0]:
+                    best = (key, start, room_id)
+    if best is None:
+        return None
+    return best[1], best[2]
+
 # Example usage (replace with API endpoint in production):
 # slots = suggest_slots(appointments, therapists, rooms, request)
 # return slots
@@ -1,17 +1,175 @@
 # Placeholder for Celery background tasks
+import json
+from datetime import date, datetime, timedelta
 from celery import Celery
-from app.core.config import settings
-from app.core.email import send_email
+from celery.schedules import crontab
+from app.core.config import get_email_settings, settings
+from app.core import partitions
+from app.core.database import SessionLocal
+from app.models.base import Employee, RoleEnum
+from app.services import forecasting, optimizer, reports, rollups, sites, snapshots
 
 celery_app = Celery(
     "worker",
-    broker="redis://localhost:6379/0",
-    backend="redis://localhost:6379/0",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
 )
 
+celery_app.conf.beat_schedule = {
+    # Safety net for the incremental rollup writes done by the booking endpoints
+    "refresh-daily-rollups": {
+        "task": "app.core.tasks.refresh_rollups_task",
+        "schedule": crontab(hour=2, minute=15),
+    },
+    # Off-peak report precomputation, after the rollups are rebuilt
+    "precompute-reports": {
+        "task": "app.core.tasks.precompute_reports_task",
+        "schedule": crontab(hour=2, minute=45),
+    },
+    # Late-arriving bookings mark snapshots stale; rebuild just those
+    "recompute-stale-reports": {
+        "task": "app.core.tasks.recompute_stale_reports_task",
+        "schedule": 300.0,
+    },
+    # Fit each site's no-show model once a day, off the request path; hourly so a
+    # new install or a missed run is caught up within the hour
+    "fit-no-show-models": {
+        "task": "app.core.tasks.fit_no_show_models_task",
+        "schedule": crontab(minute=5),
+    },
+    # Keep the next months' appointment partitions ready (Postgres only)
+    "ensure-partitions": {
+        "task": "app.core.tasks.ensure_partitions_task",
+        "schedule": crontab(hour=1, minute=30),
+    },
+}
+
+# Roles that receive the daily report
+REPORT_RECIPIENT_ROLES = [RoleEnum.manager, RoleEnum.partner]
+
 @celery_app.task
 def send_report_email_task(subject: str, body: str, to: str = None):
-    import asyncio
-    asyncio.run(send_email(subject, body, to))
+    # The SMTP client is imported by the first email task, not at worker startup
+    from app.core.email import build_message, get_mailer
+    return get_mailer().send_batch([build_message(subject, body, to)])
+
+@celery_app.task
+def send_email_batch_task(subject: str, body: str, recipients: list, attachments: list = ()):
+    # One pooled SMTP connection for the whole batch
+    from app.core.email import build_message, get_mailer
+    return get_mailer().send_batch([build_message(subject, body, to, attachments) for to in recipients])
+
+def fan_out(task, *args):
+    # Queue `task` once per active site; each site's work runs as its own task
+    db = SessionLocal()
+    try:
+        site_ids = sites.active_site_ids(db)
+    finally:
+        db.close()
+    for site_id in site_ids:
+        task.delay(*args, site_id=site_id)
+    return len(site_ids)
+
+@celery_app.task
+def send_daily_report_to_managers_task(date_str: str = None, site_id: int = None):
+    # Build the site's report once and fan it out to its active managers/partners in batches
+    if site_id is None:
+        return fan_out(send_daily_report_to_managers_task, date_str)
+    day = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else date.today()
+    db = SessionLocal()
+    try:
+        report = snapshots.get_or_build(db, "daily", day, site_id)
+        body = reports.daily_report_text(report)
+        recipients = [email for (email,) in db.query(Employee.email).filter(
+            Employee.site_id == site_id, Employee.role.in_(REPORT_RECIPIENT_ROLES),
+            Employee.is_active.is_(True), Employee.email.isnot(None),
+        )]
+    finally:
+        db.close()
+    subject = f"Daily report {day.isoformat()}"
+    attachments = [(f"daily-report-{site_id}-{day.isoformat()}.json", json.dumps(report), "application/json")]
+    batch_size = get_email_settings().EMAIL_BATCH_SIZE
+    for start in range(0, len(recipients), batch_size):
+        send_email_batch_task.delay(subject, body, recipients[start:start + batch_size], attachments)
+    return len(recipients)
+
+@celery_app.task
+def precompute_reports_task(date_str: str = None, site_id: int = None):
+    # Store yesterday's and today's daily and rolling weekly reports
+    if site_id is None:
+        return fan_out(precompute_reports_task, date_str)
+    last_day = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else date.today()
+    db = SessionLocal()
+    try:
+        for day in (last_day - timedelta(days=1), last_day):
+            for report_type in snapshots.REPORT_TYPES:
+                snapshots.store_snapshot(db, report_type, day, site_id)
+    finally:
+        db.close()
+
+@celery_app.task
+def recompute_stale_reports_task(site_id: int = None):
+    if site_id is None:
+        return fan_out(recompute_stale_reports_task)
+    db = SessionLocal()
+    try:
+        stale = snapshots.stale_snapshots(db, site_id)
+        for report_type, day in stale:
+            snapshots.store_snapshot(db, report_type, day, site_id)
+        return len(stale)
+    finally:
+        db.close()
+
+@celery_app.task
+def refresh_rollups_task(date_str: str = None, days: int = 2, site_id: int = None):
+    # Rebuild the daily rollups for the `days` days ending on date_str (default: today)
+    if site_id is None:
+        return fan_out(refresh_rollups_task, date_str, days)
+    last_day = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else date.today()
+    db = SessionLocal()
+    try:
+        rollups.refresh_days(db, [last_day - timedelta(days=n) for n in range(days)], site_id)
+        db.commit()
+    finally:
+        db.close()
+
+@celery_app.task
+def fit_no_show_models_task(date_str: str = None, site_id: int = None):
+    # Store the site's no-show model fitted on its history up to date_str (default: today)
+    if site_id is None:
+        return fan_out(fit_no_show_models_task, date_str)
+    today = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else date.today()
+    db = SessionLocal()
+    try:
+        if forecasting.has_model(db, today, site_id):
+            return False
+        forecasting.store_model(db, today, site_id)
+        return True
+    finally:
+        db.close()
+
+@celery_app.task
+def ensure_partitions_task():
+    db = SessionLocal()
+    try:
+        created = partitions.ensure_partitions(db.connection())
+        db.commit()
+        return created
+    finally:
+        db.close()
+
+@celery_app.task
+def optimize_batch_task(site_id: int, date_str: str, requests: list):
+    # Assign a batch of {"therapist"?: employee id, "room"?: room id} requests for
+    # one day of one site with scheduler.optimize_batch, under that site's rules.
+    # Returns one {"slot", "therapist", "room"} (or None) per request.
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    db = SessionLocal()
+    try:
+        loaded = optimizer.load_day(db, site_id, day)
+    finally:
+        db.close()
+    assignments = optimizer.solve(loaded, requests)
+    return [dict(assignment, slot=assignment["slot"].isoformat()) if assignment else None for assignment in assignments]
 
 # Add more background tasks for alerts, analytics, etc.
@@ -3,13 +3,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
 from app.api import router as api_router
 
-# Select database backend
-if settings.DB_BACKEND == "sqlite":
-	from app.core.database_sqlite import engine, SessionLocal, Base
-else:
-	from app.core.database_postgres import engine, SessionLocal, Base
+# The database engine is created lazily by app.core.database on first use,
+# configured for DB_BACKEND from settings
 
 
 app = FastAPI(title="Sports Biz Boost Backend")
@@ -23,4 +21,8 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+	# Per-route latency, SQL query counts and the X-Profile sampler; served on /metrics
+	app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router)
@@ -1,8 +1,34 @@
-from sqlalchemy import Column, Integer, String, Float, Enum, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, Enum, ForeignKey, DateTime, Date, Boolean, JSON, Index, UniqueConstraint, DDL, event, or_
 from sqlalchemy.orm import relationship
+from app.core import partitions
 from app.core.database import Base
 import enum
 
+# Rows created without a site belong to this one; it is inserted with the sites
+# table, so a single-clinic deployment never has to create it
+DEFAULT_SITE_ID = 1
+
+# Appointments in these statuses free their slot and earn nothing: conflict
+# checks, occupancy, rollups and payroll leave them out (listings still show them)
+RELEASED_STATUSES = ("cancelled", "no_show")
+
+class Site(Base):
+    # One clinic. Rooms, staff, patients and appointments belong to a site, and
+    # scheduler and report queries are scoped to one through site-leading indexes.
+    __tablename__ = "sites"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+    # The site's room/therapist booking rules; see app.core.scheduler
+    scheduler_rules = Column(JSON, nullable=True)
+
+event.listen(Site.__table__, "after_create", DDL(
+    "INSERT INTO sites (name, is_active) VALUES ('Main clinic', TRUE)"
+))
+
+def site_column():
+    return Column(Integer, ForeignKey("sites.id"), nullable=False, server_default=str(DEFAULT_SITE_ID))
+
 class RoleEnum(str, enum.Enum):
     junior = "junior"
     junior_associate = "junior_associate"
@@ -14,6 +40,7 @@ class RoleEnum(str, enum.Enum):
 class Employee(Base):
     __tablename__ = "employees"
     id = Column(Integer, primary_key=True, index=True)
+    site_id = site_column()
     name = Column(String, nullable=False)
     role = Column(Enum(RoleEnum), nullable=False)
     fixed_salary = Column(Float, nullable=True)
@@ -21,32 +48,107 @@ class Employee(Base):
     email = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True)
     appointments = relationship("Appointment", back_populates="therapist")
+    __table_args__ = (
+        Index("ix_employees_site_role", "site_id", "role"),
+    )
 
 class Room(Base):
     __tablename__ = "rooms"
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False, unique=True)
+    site_id = site_column()
+    name = Column(String, nullable=False)
     appointments = relationship("Appointment", back_populates="room")
+    __table_args__ = (
+        # Room names (which the scheduler rules refer to) are unique within a site
+        UniqueConstraint("site_id", "name", name="uq_rooms_site_name"),
+    )
 
 class Client(Base):
+    # A patient's home site; they can still be booked at any site
     __tablename__ = "clients"
     id = Column(Integer, primary_key=True, index=True)
+    site_id = site_column()
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True)
     appointments = relationship("Appointment", back_populates="client")
+    __table_args__ = (
+        Index("ix_clients_site_name", "site_id", "name"),
+    )
 
 class Appointment(Base):
+    # site_id is always the room's site (set by the booking and import code).
+    # On Postgres the table is range-partitioned by month on start_time; see
+    # app.core.partitions.
     __tablename__ = "appointments"
     id = Column(Integer, primary_key=True, index=True)
+    site_id = site_column()
     therapist_id = Column(Integer, ForeignKey("employees.id"))
     client_id = Column(Integer, ForeignKey("clients.id"))
     room_id = Column(Integer, ForeignKey("rooms.id"))
-    start_time = Column(DateTime, nullable=False)
+    start_time = Column(DateTime, nullable=False, index=True)
     end_time = Column(DateTime, nullable=False)
     revenue = Column(Float, nullable=False)
     status = Column(String, default="booked")
     therapist = relationship("Employee", back_populates="appointments")
     client = relationship("Client", back_populates="appointments")
     room = relationship("Room", back_populates="appointments")
+    __table_args__ = (
+        Index("ix_appointments_site_time", "site_id", "start_time"),
+        Index("ix_appointments_room_time", "room_id", "start_time", "end_time"),
+        Index("ix_appointments_therapist_time", "therapist_id", "start_time", "end_time"),
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
+
+def holds_slot():
+    # SQL condition for appointments that still occupy their room and therapist
+    return or_(Appointment.status.is_(None), Appointment.status.notin_(RELEASED_STATUSES))
+
+# A partitioned table's primary key must include the partition key, so on
+# Postgres it is (id, start_time); the ORM still identifies rows by id
+Appointment.__table__.primary_key.ddl_if(callable_=lambda ddl, target, bind, dialect=None, **kw: dialect.name != "postgresql")
+event.listen(Appointment.__table__, "after_create", DDL(
+    "ALTER TABLE appointments ADD PRIMARY KEY (id, start_time)"
+).execute_if(dialect="postgresql"))
+
+# On Postgres the database itself rejects overlapping bookings, so concurrent
+# writers cannot both pass the pre-insert conflict check. The exclusion
+# constraints live on each partition (see app.core.partitions).
+event.listen(Appointment.__table__, "before_create", DDL(
+    "CREATE EXTENSION IF NOT EXISTS btree_gist"
+).execute_if(dialect="postgresql"))
+
+@event.listens_for(Appointment.__table__, "after_create")
+def create_partitions(target, connection, **kw):
+    partitions.create_default_partition(connection)
+    partitions.ensure_partitions(connection)
+
+class DailyRollup(Base):
+    # Materialized per day x room x therapist aggregates of appointments.
+    # Kept current by the booking endpoints and rebuilt by refresh_rollups_task.
+    __tablename__ = "daily_rollups"
+    day = Column(Date, primary_key=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), primary_key=True)
+    therapist_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    site_id = site_column()
+    sessions = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    booked_minutes = Column(Integer, nullable=False, default=0)
+    __table_args__ = (
+        Index("ix_daily_rollups_site_day", "site_id", "day"),
+    )
+
+class ReportSnapshot(Base):
+    # Precomputed /api/reports payloads keyed by (site, type, date). Bookings in a
+    # snapshot's source dates mark it stale; recompute_stale_reports_task rebuilds it.
+    __tablename__ = "report_snapshots"
+    site_id = Column(Integer, ForeignKey("sites.id"), primary_key=True)
+    report_type = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    payload = Column(JSON, nullable=False)
+    computed_at = Column(DateTime, nullable=False)
+    stale = Column(Boolean, nullable=False, default=False)
+    __table_args__ = (
+        Index("ix_report_snapshots_site_stale", "site_id", "stale"),
+    )
 
 # Add more models for classes, attendance, resources, salaries, alerts, reports, etc.
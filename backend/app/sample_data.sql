@@ -1,5 +1,12 @@
 -- Sample data for Sports Biz Boost
 
+-- The default site (created with the schema); every row below belongs to it.
+-- Joe's Room [A] (room 7) is shared by Joseph March (employee 9) and the juniors
+-- Leslie Evangelista and Jen Chu (1, 2); juniors work in at most 3 rooms.
+UPDATE sites SET
+  name = 'Sports Biz Boost',
+  scheduler_rules = '{"shared_rooms": {"7": {"9": 0.7, "1": 0.3, "2": 0.3}}, "max_rooms": {"junior": 3}}'
+WHERE id = 1;
 
 -- Therapists (expanded)
 INSERT INTO employees (id, name, role, fixed_salary, commission_rate, email, is_active) VALUES
@@ -1,6 +1,14 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
+from datetime import date, datetime
+from app.models.base import DEFAULT_SITE_ID
+
+def _check_times(appointment):
+    # Zero-length and inverted bookings never match the overlap checks, and
+    # Postgres rejects the inverted range in the exclusion constraints
+    if appointment.end_time <= appointment.start_time:
+        raise ValueError("end_time must be after start_time")
+    return appointment
 
 class AppointmentBase(BaseModel):
     therapist_id: int
@@ -11,6 +19,8 @@ class AppointmentBase(BaseModel):
     revenue: Optional[float] = 0.0
     status: Optional[str] = "booked"
 
+    _times = model_validator(mode="after")(_check_times)
+
 class AppointmentCreate(AppointmentBase):
     pass
 
@@ -23,7 +33,31 @@ class AppointmentManualCreate(BaseModel):
     revenue: Optional[float] = 0.0
     status: Optional[str] = "booked"
 
+    _times = model_validator(mode="after")(_check_times)
+
 class AppointmentOut(AppointmentBase):
     id: int
+    site_id: int
     class Config:
         orm_mode = True
+
+class RecurringAppointmentCreate(AppointmentManualCreate):
+    # start_time/end_time are the first occurrence; the rest follow the rule
+    frequency: str = "weekly"  # "daily" or "weekly"
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[date] = None
+    weekdays: Optional[List[int]] = None  # weekly only, 0 = Monday; defaults to the first occurrence's day
+    alternative_room_ids: Optional[List[int]] = None  # also searched for alternatives to conflicting occurrences
+    on_conflict: str = "reject"  # "reject", "skip" or "reschedule"
+    dry_run: bool = False
+
+class BatchRequest(BaseModel):
+    # A pending booking; a missing therapist or room is left to the optimizer
+    therapist_id: Optional[int] = None
+    room_id: Optional[int] = None
+
+class OptimizeDay(BaseModel):
+    date: date
+    site_id: int = DEFAULT_SITE_ID
+    requests: List[BatchRequest]
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, EmailStr
+from typing import Optional
+from app.models.base import DEFAULT_SITE_ID
+
+class ClientBase(BaseModel):
+    name: str
+    email: Optional[EmailStr] = None
+
+class ClientCreate(ClientBase):
+    site_id: int = DEFAULT_SITE_ID  # the patient's home site
+
+class ClientOut(ClientBase):
+    id: int
+
+    class Config:
+        orm_mode = True
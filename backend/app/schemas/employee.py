@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 import enum
+from app.models.base import DEFAULT_SITE_ID
 
 class RoleEnum(str, enum.Enum):
     junior = "junior"
@@ -19,6 +20,7 @@ class EmployeeBase(BaseModel):
 class EmployeeCreate(EmployeeBase):
     fixed_salary: Optional[float]
     commission_rate: Optional[float]
+    site_id: int = DEFAULT_SITE_ID
 
 class EmployeeOut(EmployeeBase):
     id: int
@@ -28,4 +30,4 @@ class EmployeeOut(EmployeeBase):
     class Config:
         orm_mode = True
 
-# Add more schemas for Client, Appointment, Analytics, etc.
+# Add more schemas for Analytics, etc.
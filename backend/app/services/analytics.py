@@ -1,5 +1,9 @@
 # This file will contain business logic for analytics, salary, commission, and reporting
 # Example: calculate salary, commission, and profit for each employee
+# NumPy is imported by the functions that use it, so the API starts without it
+
+from datetime import datetime, time, timedelta
+from app.models.base import DEFAULT_SITE_ID, Appointment, Employee, holds_slot
 
 def calculate_salary_and_commission(role: str, revenue: float, fixed_salary: float = 0.0, commission_rate: float = 0.0):
     if role == "junior":
@@ -8,4 +12,84 @@ def calculate_salary_and_commission(role: str, revenue: float, fixed_salary: flo
         commission = revenue * commission_rate
         return 0.0, commission
 
+def _employee_positions(therapist_ids, employee_ids):
+    # Row of each appointment's therapist in the employee columns, plus a mask of known therapists
+    import numpy as np
+    order = np.argsort(employee_ids, kind="stable")
+    sorted_ids = employee_ids[order]
+    if not len(sorted_ids):
+        return np.zeros(len(therapist_ids), dtype=np.int64), np.zeros(len(therapist_ids), dtype=bool)
+    pos = np.clip(np.searchsorted(sorted_ids, therapist_ids), 0, len(sorted_ids) - 1)
+    return order[pos], sorted_ids[pos] == therapist_ids
+
+def calculate_payroll(revenue, therapist_ids, employee_ids, roles, fixed_salaries, commission_rates, periods=None, n_periods=None):
+    # Vectorized calculate_salary_and_commission for every employee and period in one pass.
+    # Appointment columns: revenue, therapist_ids and optional integer period indexes.
+    # Employee columns: employee_ids, roles, fixed_salaries, commission_rates (None counts as 0).
+    # Returns (n_employees, n_periods) arrays of revenue, salary, commission and profit.
+    import numpy as np
+    revenue = np.asarray(revenue, dtype=np.float64)
+    therapist_ids = np.asarray(therapist_ids, dtype=np.int64)
+    employee_ids = np.asarray(employee_ids, dtype=np.int64)
+    periods = np.zeros(len(revenue), dtype=np.int64) if periods is None else np.asarray(periods, dtype=np.int64)
+    if n_periods is None:
+        n_periods = int(periods.max()) + 1 if len(periods) else 1
+    n_employees = len(employee_ids)
+
+    rows, known = _employee_positions(therapist_ids, employee_ids)
+    flat = rows[known] * n_periods + periods[known]
+    employee_revenue = np.bincount(
+        flat, weights=revenue[known], minlength=n_employees * n_periods
+    ).reshape(n_employees, n_periods)
+
+    junior = (np.asarray(roles, dtype=object) == "junior")[:, None]
+    fixed = np.nan_to_num(np.asarray(fixed_salaries, dtype=np.float64))[:, None]
+    rate = np.nan_to_num(np.asarray(commission_rates, dtype=np.float64))[:, None]
+    salary = np.where(junior, fixed, 0.0) * np.ones((1, n_periods))
+    commission = np.where(junior, 0.0, employee_revenue * rate)
+    return {
+        "employee_ids": employee_ids,
+        "revenue": employee_revenue,
+        "salary": salary,
+        "commission": commission,
+        "profit": employee_revenue - salary - commission,
+    }
+
+def calculate_room_profit(revenue, therapist_ids, room_ids, employee_ids, roles, commission_rates, n_rooms=None):
+    # Revenue less the commission paid on each appointment, summed per room id
+    import numpy as np
+    revenue = np.asarray(revenue, dtype=np.float64)
+    room_ids = np.asarray(room_ids, dtype=np.int64)
+    rows, known = _employee_positions(np.asarray(therapist_ids, dtype=np.int64), np.asarray(employee_ids, dtype=np.int64))
+    junior = np.asarray(roles, dtype=object) == "junior"
+    rate = np.where(junior, 0.0, np.nan_to_num(np.asarray(commission_rates, dtype=np.float64)))
+    commission = np.where(known, revenue * rate[rows] if len(rate) else 0.0, 0.0)
+    minlength = n_rooms if n_rooms is not None else (int(room_ids.max()) + 1 if len(room_ids) else 0)
+    return np.bincount(room_ids, weights=revenue - commission, minlength=minlength)
+
+def monthly_payroll(db, first_day, last_day, site_id=DEFAULT_SITE_ID):
+    # Payroll per employee of the site per calendar month for its appointments in [first_day, last_day]
+    import numpy as np
+    rows = db.query(Appointment.therapist_id, Appointment.start_time, Appointment.revenue).filter(
+        Appointment.site_id == site_id,
+        Appointment.start_time >= datetime.combine(first_day, time.min),
+        Appointment.start_time < datetime.combine(last_day + timedelta(days=1), time.min),
+        holds_slot(),
+    ).all()
+    employees = db.query(Employee.id, Employee.role, Employee.fixed_salary, Employee.commission_rate).filter(
+        Employee.site_id == site_id
+    ).order_by(Employee.id).all()
+    therapist_ids, start_times, revenue = zip(*rows) if rows else ((), (), ())
+    months = np.array(start_times, dtype="datetime64[M]")
+    first_month = np.datetime64(first_day, "M")
+    n_periods = int(np.datetime64(last_day, "M") - first_month) + 1
+    employee_ids, roles, fixed_salaries, commission_rates = zip(*employees) if employees else ((), (), (), ())
+    result = calculate_payroll(
+        revenue, [t if t is not None else -1 for t in therapist_ids],
+        employee_ids, [getattr(role, "value", role) for role in roles], fixed_salaries, commission_rates,
+        periods=(months - first_month).astype(np.int64), n_periods=n_periods,
+    )
+    result["months"] = [str(first_month + n) for n in range(n_periods)]
+    return result
+
 # Add more business logic for analytics, alerts, and reports
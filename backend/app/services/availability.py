@@ -0,0 +1,96 @@
+# Availability search over a date range, a set of therapists (by id or role)
+# and a set of rooms. The occupancy for the whole window is loaded with one
+# range query into a ScheduleWindow; the sweep runs in memory and yields hits day by
+# day, so the API can stream them while later days are still being searched.
+
+import json
+from datetime import datetime, time, timedelta
+from app.core import metrics
+from app.core.day_schedule import ScheduleWindow, at_minute, minute_of
+from app.core.scheduler import merge_intervals, free_gaps
+from app.models.base import DEFAULT_SITE_ID, Employee, Room
+
+MAX_DAYS = 31
+MAX_RESULTS = 5000
+
+def resolve_resources(db, roles=None, therapist_ids=None, room_ids=None, site_id=DEFAULT_SITE_ID):
+    # (id, name) rows for the site's active therapists and rooms matching the filters
+    therapists = db.query(Employee.id, Employee.name).filter(Employee.site_id == site_id, Employee.is_active.is_(True))
+    if roles:
+        therapists = therapists.filter(Employee.role.in_(roles))
+    if therapist_ids:
+        therapists = therapists.filter(Employee.id.in_(therapist_ids))
+    rooms = db.query(Room.id, Room.name).filter(Room.site_id == site_id)
+    if room_ids:
+        rooms = rooms.filter(Room.id.in_(room_ids))
+    return therapists.order_by(Employee.id).all(), rooms.order_by(Room.id).all()
+
+def _sweep(therapists, rooms, window, days, duration, step, start_hour, end_hour, not_before, limit):
+    # Works in minutes from midnight on the compact DaySchedules; datetimes are
+    # only built for the hits that are yielded
+    found = 0
+    for day in days:
+        open_at, close_at = start_hour * 60, end_hour * 60
+        if not_before is not None:
+            earliest = minute_of(not_before, day)
+            if earliest > open_at:
+                # Round up to the next step boundary so past slots are never offered
+                open_at += -((open_at - earliest) // step) * step
+        therapist_busy, room_busy = window[day].busy_by()
+        hits = []
+        for t_rank, (therapist_id, therapist_name) in enumerate(therapists):
+            busy_therapist = therapist_busy.get(therapist_id, [])
+            for r_rank, (room_id, room_name) in enumerate(rooms):
+                busy = merge_intervals(busy_therapist + room_busy.get(room_id, []))
+                for gap_start, gap_end in free_gaps(busy, open_at, close_at):
+                    start = open_at + -((open_at - gap_start) // step) * step
+                    while start + duration <= gap_end:
+                        hits.append((start, t_rank, r_rank))
+                        start += step
+        hits.sort()
+        stamps = {}
+        for start, t_rank, r_rank in hits:
+            therapist_id, therapist_name = therapists[t_rank]
+            room_id, room_name = rooms[r_rank]
+            if start not in stamps:
+                stamps[start] = (at_minute(day, start).isoformat(), at_minute(day, start + duration).isoformat())
+            start_time, end_time = stamps[start]
+            yield {
+                "date": day.isoformat(),
+                "start_time": start_time,
+                "end_time": end_time,
+                "therapist_id": therapist_id,
+                "therapist": therapist_name,
+                "room_id": room_id,
+                "room": room_name,
+            }
+            found += 1
+            if found >= limit:
+                return
+
+def search_availability(db, first_day, last_day, duration_minutes=60, roles=None, therapist_ids=None, room_ids=None,
+                        step_minutes=30, start_hour=8, end_hour=18, limit=200, not_before=None, site_id=DEFAULT_SITE_ID):
+    # Loads the occupancy snapshot now and returns a lazy generator of hits, ranked
+    # by day, then start time, then therapist and room id. The generator does not
+    # touch the session, so it can outlive the request's DB dependency.
+    if last_day < first_day:
+        raise ValueError("end_date must not be before start_date")
+    n_days = (last_day - first_day).days + 1
+    if n_days > MAX_DAYS:
+        raise ValueError(f"search window is limited to {MAX_DAYS} days")
+    therapists, rooms = resolve_resources(db, roles, therapist_ids, room_ids, site_id)
+    window_start = datetime.combine(first_day, time(start_hour))
+    window_end = datetime.combine(last_day, time(end_hour))
+    window = ScheduleWindow()
+    if therapists and rooms:
+        with metrics.phase("occupancy_load"):
+            window = ScheduleWindow.load(db, window_start, window_end, [t for t, _ in therapists], [r for r, _ in rooms])
+    days = [first_day + timedelta(days=i) for i in range(n_days)]
+    return _sweep(
+        therapists, rooms, window, days, duration_minutes, step_minutes, start_hour, end_hour, not_before,
+        min(limit, MAX_RESULTS),
+    )
+
+def ndjson(hits):
+    for hit in hits:
+        yield json.dumps(hit) + "\n"
@@ -0,0 +1,120 @@
+# Conflict detection for booking writes.
+# Postgres enforces non-overlap with exclusion constraints on every monthly
+# partition (see app/core/partitions.py); SQLite has no equivalent, so booking
+# transactions take the write lock up front. A booking belongs to the site of
+# its therapist and room, which must be the same.
+
+import logging
+from datetime import timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app.core import partitions, scheduler
+from app.core.cache import response_cache
+from app.core.pubsub import broker, schedule_channel
+from app.models.base import Appointment, holds_slot
+from app.services import listings, rollups, sites, snapshots
+
+log = logging.getLogger(__name__)
+
+class BookingConflict(Exception):
+    def __init__(self, resource):
+        self.resource = resource
+        super().__init__(f"{resource.capitalize()} is already booked for this timeslot.")
+
+class NoSlotAvailable(Exception):
+    def __init__(self):
+        super().__init__("No available slot found.")
+
+def serialize_booking(db):
+    # Start the transaction with BEGIN IMMEDIATE on SQLite so concurrent bookers
+    # queue on the write lock before their conflict check instead of after it
+    if db.get_bind().dialect.name == "sqlite":
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+def find_conflict(db, room_id, therapist_id, start_time, end_time):
+    # One round-trip for both the room and the therapist; each side of the OR is a
+    # range scan on its (id, start_time, end_time) index
+    row = db.query(Appointment.room_id).filter(
+        or_(Appointment.room_id == room_id, Appointment.therapist_id == therapist_id),
+        Appointment.start_time > start_time - timedelta(days=1),
+        Appointment.start_time < end_time,
+        Appointment.end_time > start_time,
+        holds_slot(),
+    ).order_by((Appointment.room_id == room_id).desc()).first()
+    if row is None:
+        return None
+    return "room" if row.room_id == room_id else "therapist"
+
+def check_conflict(db, room_id, therapist_id, start_time, end_time):
+    resource = find_conflict(db, room_id, therapist_id, start_time, end_time)
+    if resource:
+        raise BookingConflict(resource)
+
+def commit_booking(db):
+    # Commit, turning an exclusion-constraint violation into a BookingConflict
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        constraint = getattr(getattr(exc.orig, "diag", None), "constraint_name", None)
+        resource = partitions.constraint_resource(constraint)
+        if resource is None:
+            raise
+        raise BookingConflict(resource) from exc
+
+def booking_site(db, therapist_id, room_ids):
+    # sites.booking_site inside a booking transaction: rolled back on a ValueError
+    try:
+        return sites.booking_site(db, therapist_id, room_ids)
+    except ValueError:
+        db.rollback()
+        raise
+
+def _insert(db, values):
+    day = values["start_time"].date()
+    partitions.ensure_partitions(db.connection(), day, day)
+    appointment = Appointment(**values)
+    db.add(appointment)
+    rollups.apply_appointment(db, appointment)
+    snapshots.mark_stale(db, [appointment.start_time.date()], appointment.site_id)
+    commit_booking(db)
+    db.refresh(appointment)
+    announce_bookings(db, appointment.site_id, {appointment.id: appointment.start_time.date()})
+    return appointment
+
+def announce_bookings(db, site_id, day_of):
+    # After a booking commits: invalidate the cached views of its days and push the
+    # appointments ({id: day}) to the schedule feed. The booking already stands, so
+    # a cache or broker failure (e.g. Redis down) is logged, not returned as an
+    # error; cached views expire with their TTL and feed clients resync on reconnect.
+    days = sorted(set(day_of.values()))
+    try:
+        response_cache.invalidate_dates(days, site_id)
+    except Exception:
+        log.exception("could not invalidate cached views of site %s for %s", site_id, days)
+    try:
+        for entry in listings.schedule_entries(db, list(day_of)):
+            broker.publish(schedule_channel(day_of[entry["id"]], site_id), {"type": "appointment", "data": entry})
+    except Exception:
+        log.exception("could not publish appointments %s of site %s", list(day_of), site_id)
+
+def smart_book(db, payload):
+    # Book the slot suggest_slot() finds for the payload
+    serialize_booking(db)
+    site_id = booking_site(db, payload.therapist_id, [payload.room_id])
+    suggestion = scheduler.suggest_slot(payload, db)
+    if not suggestion:
+        db.rollback()
+        raise NoSlotAvailable()
+    return _insert(db, {**suggestion.dict(), "site_id": site_id})
+
+def manual_book(db, payload):
+    # Book exactly the requested room and timeslot if neither room nor therapist is taken
+    serialize_booking(db)
+    site_id = booking_site(db, payload.therapist_id, [payload.room_id])
+    try:
+        check_conflict(db, payload.room_id, payload.therapist_id, payload.start_time, payload.end_time)
+    except BookingConflict:
+        db.rollback()
+        raise
+    return _insert(db, {**payload.dict(), "site_id": site_id})
@@ -0,0 +1,349 @@
+# Bulk import/export of appointments, clients and employees.
+# Imports stream CSV/JSONL in chunks, validate each chunk with the API schemas,
+# write rejected rows (with the reason) to a JSONL reject file, and load the rest
+# with COPY on Postgres or one executemany insert per chunk elsewhere. Rows
+# repeating a unique key (id, email), pointing at a missing row, or overlapping
+# a room's or therapist's booking are rejected before loading, so re-running an
+# import rejects what it already loaded. A chunk the database still refuses is
+# retried row by row, and the refused rows are rejected.
+# Appointments take the site of their room; on Postgres the monthly partitions
+# the file covers are created before its rows are loaded.
+# Exports stream the table in chunks to CSV or Parquet (pyarrow).
+#
+#   python -m app.services.bulk import appointments history.csv --rejects rejects.jsonl
+#   python -m app.services.bulk export appointments appointments.parquet
+
+import argparse
+import bisect
+import csv
+import enum
+import io
+import json
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pydantic import ValidationError
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from app.core import partitions
+from app.core.cache import response_cache
+from app.core.pubsub import broker, schedule_channel
+from app.models.base import RELEASED_STATUSES, Appointment, Client, Employee, Room, holds_slot
+from app.schemas.appointment import AppointmentCreate
+from app.schemas.client import ClientCreate
+from app.schemas.employee import EmployeeCreate
+from app.services import rollups, snapshots
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+ENTITIES = {
+    "appointments": (Appointment, AppointmentCreate),
+    "clients": (Client, ClientCreate),
+    "employees": (Employee, EmployeeCreate),
+}
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    # Yield lists of raw row dicts from a .csv or .jsonl file without loading it whole
+    with open(path, newline="") as f:
+        rows = csv.DictReader(f) if path.endswith(".csv") else (json.loads(line) for line in f if line.strip())
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def _plain(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+def validate_chunk(schema, chunk):
+    # Returns (valid rows as column dicts, rejected (row, reason) pairs).
+    # Empty cells fall back to the schema default (None where there is none); an
+    # "id" column is kept so foreign keys in related files still line up.
+    fields = schema.model_fields
+    valid, rejected = [], []
+    for row in chunk:
+        cleaned = {}
+        for k, v in row.items():
+            if v not in ("", None):
+                cleaned[k] = v
+            elif k in fields and fields[k].is_required():
+                cleaned[k] = None
+        try:
+            values = {k: _plain(v) for k, v in schema(**cleaned).model_dump().items()}
+            if "id" in cleaned:
+                values["id"] = int(cleaned["id"])
+        except (ValidationError, ValueError, TypeError) as exc:
+            rejected.append((row, str(exc)))
+            continue
+        valid.append(values)
+    return valid, rejected
+
+def assign_sites(db, rows):
+    # Set each appointment's site_id from its room, one query per chunk.
+    # Returns (rows with a known room, rejected (row, reason) pairs).
+    site_of = dict(db.query(Room.id, Room.site_id).filter(Room.id.in_({row["room_id"] for row in rows})))
+    valid, rejected = [], []
+    for row in rows:
+        if row["room_id"] not in site_of:
+            rejected.append((row, f"unknown room {row['room_id']}"))
+            continue
+        row["site_id"] = site_of[row["room_id"]]
+        valid.append(row)
+    return valid, rejected
+
+def check_keys(db, model, rows):
+    # Reject rows that repeat a unique column (of an existing row or an earlier
+    # row of the chunk) or whose foreign keys match nothing; one query per column.
+    # Returns (valid rows, rejected (row, reason) pairs).
+    reasons = {}
+    for column in model.__table__.columns:
+        if not (column.primary_key or column.unique or column.foreign_keys):
+            continue
+        values = {row[column.name] for row in rows if row.get(column.name) is not None}
+        if not values:
+            continue
+        if column.foreign_keys:
+            target = next(iter(column.foreign_keys)).column
+            found = set(db.execute(select(target).where(target.in_(values))).scalars())
+            for i, row in enumerate(rows):
+                value = row.get(column.name)
+                if value is not None and value not in found:
+                    reasons.setdefault(i, f"unknown {column.name} {value}")
+        else:
+            seen = set(db.execute(select(column).where(column.in_(values))).scalars())
+            for i, row in enumerate(rows):
+                value = row.get(column.name)
+                if value is None:
+                    continue
+                if value in seen:
+                    reasons.setdefault(i, f"duplicate {column.name} {value}")
+                seen.add(value)
+    return [row for i, row in enumerate(rows) if i not in reasons], [(rows[i], reason) for i, reason in sorted(reasons.items())]
+
+def _overlaps(intervals, start, end):
+    # intervals: sorted (start, end) pairs; no booking spans more than a day
+    for busy_start, busy_end in intervals[bisect.bisect_left(intervals, (start - timedelta(days=1),)):]:
+        if busy_start >= end:
+            return False
+        if busy_end > start:
+            return True
+    return False
+
+def check_overlaps(db, rows):
+    # Reject appointments overlapping an existing booking, or an earlier row of
+    # the chunk, of the same room or therapist; one query for the chunk's window.
+    # Cancelled and no-show rows are left out on both sides.
+    # Returns (valid rows, rejected (row, reason) pairs).
+    first = min(row["start_time"] for row in rows)
+    last = max(row["end_time"] for row in rows)
+    existing = db.query(Appointment.room_id, Appointment.therapist_id, Appointment.start_time, Appointment.end_time).filter(
+        or_(
+            Appointment.room_id.in_({row["room_id"] for row in rows}),
+            Appointment.therapist_id.in_({row["therapist_id"] for row in rows}),
+        ),
+        Appointment.start_time > first - timedelta(days=1),
+        Appointment.start_time < last,
+        holds_slot(),
+    )
+    busy = defaultdict(list)
+    for room_id, therapist_id, start, end in existing:
+        busy["room", room_id].append((start, end))
+        busy["therapist", therapist_id].append((start, end))
+    for intervals in busy.values():
+        intervals.sort()
+    valid, rejected = [], []
+    for row in rows:
+        if row.get("status") in RELEASED_STATUSES:
+            # Holds no slot, so neither blocks nor is blocked
+            valid.append(row)
+            continue
+        resources = (("room", row["room_id"]), ("therapist", row["therapist_id"]))
+        clash = next((r for r in resources if _overlaps(busy[r], row["start_time"], row["end_time"])), None)
+        if clash:
+            rejected.append((row, f"overlaps a booking of {clash[0]} {clash[1]}"))
+            continue
+        for resource in resources:
+            bisect.insort(busy[resource], (row["start_time"], row["end_time"]))
+        valid.append(row)
+    return valid, rejected
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def load_rows(db, model, rows):
+    # One round-trip per group of rows sharing the same columns
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    for columns, group in groups.items():
+        if db.get_bind().dialect.name == "postgresql":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in group:
+                writer.writerow([_copy_value(row[c]) for c in columns])
+            buffer.seek(0)
+            cursor = db.connection().connection.cursor()
+            cursor.copy_expert(f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH CSV", buffer)
+        else:
+            db.execute(model.__table__.insert(), group)
+
+def load_chunk(db, model, rows):
+    # Load and commit a chunk. If the database refuses it, retry one row per
+    # transaction. Returns (loaded rows, refused (row, reason) pairs).
+    # COPY reports errors through the raw DBAPI cursor, hence both error types.
+    errors = (IntegrityError, db.get_bind().dialect.dbapi.IntegrityError)
+    try:
+        load_rows(db, model, rows)
+        db.commit()
+        return rows, []
+    except errors:
+        db.rollback()
+    loaded, refused = [], []
+    for row in rows:
+        try:
+            load_rows(db, model, [row])
+            db.commit()
+            loaded.append(row)
+        except errors as exc:
+            db.rollback()
+            refused.append((row, str(getattr(exc, "orig", exc)).strip()))
+    return loaded, refused
+
+def _reset_sequence(db, model):
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection().exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {model.__tablename__}), 1))"
+        )
+
+def import_file(db, entity, path, rejects_path=None, chunk_size=CHUNK_SIZE):
+    # Import one file; each chunk is committed on its own so a large file never
+    # holds one huge transaction. Returns counts of loaded and rejected rows.
+    model, schema = ENTITIES[entity]
+    loaded = rejected = 0
+    days = set()  # (site_id, day)
+    rejects = open(rejects_path, "w") if rejects_path else None
+    try:
+        for chunk in read_chunks(path, chunk_size):
+            rows, bad = validate_chunk(schema, chunk)
+            if model is Appointment and rows:
+                rows, unknown = assign_sites(db, rows)
+                bad += unknown
+            if rows:
+                rows, refused = check_keys(db, model, rows)
+                bad += refused
+            if model is Appointment and rows:
+                rows, overlapping = check_overlaps(db, rows)
+                bad += overlapping
+                if rows:
+                    # Committed on their own, so a refused chunk does not drop them
+                    partitions.ensure_partitions(
+                        db.connection(), min(row["start_time"] for row in rows).date(),
+                        max(row["start_time"] for row in rows).date(),
+                    )
+                    db.commit()
+            if rows:
+                rows, refused = load_chunk(db, model, rows)
+                bad += refused
+            if model is Appointment:
+                days.update((row["site_id"], row["start_time"].date()) for row in rows)
+            loaded += len(rows)
+            rejected += len(bad)
+            if rejects:
+                for row, reason in bad:
+                    rejects.write(json.dumps({"row": row, "error": reason}, default=str) + "\n")
+    finally:
+        if rejects:
+            rejects.close()
+    _reset_sequence(db, model)
+    by_site = {}
+    for site_id, day in days:
+        by_site.setdefault(site_id, []).append(day)
+    for site_id, site_days in by_site.items():
+        rollups.refresh_days(db, sorted(site_days), site_id)
+        snapshots.mark_stale(db, site_days, site_id)
+    db.commit()
+    for site_id, site_days in by_site.items():
+        # The rows are committed; a cache or broker failure is logged, not raised
+        try:
+            response_cache.invalidate_dates(site_days, site_id)
+            for day in site_days:
+                # Too many changes for deltas; open scheduler views refetch their snapshot
+                broker.publish(schedule_channel(day, site_id), {"type": "resync"})
+        except Exception:
+            log.exception("could not announce the import to site %s", site_id)
+    return {"loaded": loaded, "rejected": rejected}
+
+def iter_table(db, model, chunk_size=CHUNK_SIZE):
+    # Stream column tuples in chunks with a server-side cursor where supported
+    columns = [c.name for c in model.__table__.columns]
+    result = db.connection().execution_options(stream_results=True, yield_per=chunk_size).execute(
+        model.__table__.select().order_by(model.__table__.c.id)
+    )
+    for partition in result.partitions(chunk_size):
+        yield columns, partition
+
+def arrow_schema(model):
+    import pyarrow as pa
+    types = {
+        "INTEGER": pa.int64(), "FLOAT": pa.float64(), "BOOLEAN": pa.bool_(),
+        "DATETIME": pa.timestamp("us"), "DATE": pa.date32(),
+    }
+    return pa.schema([
+        (c.name, types.get(c.type.__visit_name__.upper(), pa.string())) for c in model.__table__.columns
+    ])
+
+def export_table(db, entity, path, chunk_size=CHUNK_SIZE):
+    # Write a table to .csv or .parquet one chunk at a time; returns the row count
+    model, _ = ENTITIES[entity]
+    exported = 0
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        schema = arrow_schema(model)
+        with pq.ParquetWriter(path, schema) as writer:
+            for columns, partition in iter_table(db, model, chunk_size):
+                data = {c: [_plain(row[i]) for row in partition] for i, c in enumerate(columns)}
+                writer.write_table(pa.table(data, schema=schema))
+                exported += len(partition)
+        return exported
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([c.name for c in model.__table__.columns])
+        for columns, partition in iter_table(db, model, chunk_size):
+            writer.writerows([_copy_value(_plain(v)) for v in row] for row in partition)
+            exported += len(partition)
+    return exported
+
+def main(argv=None):
+    from app.core.database import SessionLocal
+    parser = argparse.ArgumentParser(prog="python -m app.services.bulk")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("entity", choices=sorted(ENTITIES))
+    parser.add_argument("path")
+    parser.add_argument("--rejects", help="JSONL file for rows that fail validation (import only)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        if args.command == "import":
+            print(import_file(db, args.entity, args.path, args.rejects, args.chunk_size))
+        else:
+            print({"exported": export_table(db, args.entity, args.path, args.chunk_size)})
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+# No-show forecasting. A logistic regression over one-hot weekday, hour, room
+# and therapist features, fitted with NumPy on past appointments. The model is
+# additive in the logit, so scoring every (slot, room, therapist) of a week is
+# one broadcast sum rather than a loop over slots.
+# Fitting reads months of history, so it only runs in fit_no_show_models_task,
+# which stores each site's model as a report snapshot. Requests load the latest
+# stored model and score with it; until one exists they report no forecast.
+# NumPy is imported by the functions that use it, so the API and worker start
+# without it (see benchmarks/bench_startup.py).
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import or_
+from app.models.base import DEFAULT_SITE_ID, Appointment, Employee, ReportSnapshot, Room, holds_slot
+from app.services import rollups
+
+NO_SHOW = "no_show"
+CANCELLED = "cancelled"
+TRAINING_DAYS = 180
+OPEN_HOUR = 8
+CLOSE_HOUR = 18
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = (CLOSE_HOUR - OPEN_HOUR) * 60 // SLOT_MINUTES
+# Existing bookings at least this likely to no-show are offered for overbooking
+OVERBOOK_MIN_NO_SHOW = 0.35
+# Stored models are ReportSnapshot rows of this type, one per site and fit day
+MODEL_SNAPSHOT = "no_show_model"
+# How often a process looks for a newer stored model than the one it holds
+RELOAD_SECONDS = 300
+
+def _sigmoid(z):
+    import numpy as np
+    return 1.0 / (1.0 + np.exp(-z))
+
+def _hour_bins(hours):
+    import numpy as np
+    return np.clip(np.asarray(hours) - OPEN_HOUR, 0, CLOSE_HOUR - OPEN_HOUR - 1)
+
+class NoShowModel:
+    # Weights are laid out as [weekday(7) | hour | room + unseen | therapist + unseen];
+    # ids not seen in training fall into the "unseen" column, whose weight stays 0.
+    def __init__(self, room_ids, therapist_ids):
+        import numpy as np
+        self.room_index = {room_id: i for i, room_id in enumerate(room_ids)}
+        self.therapist_index = {therapist_id: i for i, therapist_id in enumerate(therapist_ids)}
+        n_hours = CLOSE_HOUR - OPEN_HOUR
+        sizes = [7, n_hours, len(self.room_index) + 1, len(self.therapist_index) + 1]
+        self.offsets = np.cumsum([0] + sizes[:-1])
+        self.weights = np.zeros(sum(sizes))
+        self.intercept = 0.0
+        self.base_rate = 0.0
+
+    def _room_positions(self, room_ids):
+        import numpy as np
+        unseen = len(self.room_index)
+        return np.array([self.room_index.get(r, unseen) for r in room_ids], dtype=np.int64)
+
+    def _therapist_positions(self, therapist_ids):
+        import numpy as np
+        unseen = len(self.therapist_index)
+        return np.array([self.therapist_index.get(t, unseen) for t in therapist_ids], dtype=np.int64)
+
+    def _columns(self, weekdays, hours, room_ids, therapist_ids):
+        import numpy as np
+        return np.stack([
+            self.offsets[0] + np.asarray(weekdays, dtype=np.int64),
+            self.offsets[1] + _hour_bins(hours),
+            self.offsets[2] + self._room_positions(room_ids),
+            self.offsets[3] + self._therapist_positions(therapist_ids),
+        ], axis=1)
+
+    @classmethod
+    def fit(cls, rows, room_ids, therapist_ids, l2=5.0, iterations=200):
+        # rows: (start_time, room_id, therapist_id, status). Diagonally preconditioned
+        # gradient descent: for one-hot blocks, 0.25 * n_blocks * counts + l2 bounds the
+        # Hessian, so the step below never overshoots and needs no line search.
+        import numpy as np
+        model = cls(room_ids, therapist_ids)
+        y = np.array([row[3] == NO_SHOW for row in rows], dtype=float)
+        model.base_rate = float(y.mean()) if rows else 0.0
+        rate = np.clip(model.base_rate, 1e-3, 1 - 1e-3)
+        model.intercept = float(np.log(rate / (1 - rate)))
+        if not rows:
+            return model
+        starts = [row[0] for row in rows]
+        cols = model._columns(
+            [s.weekday() for s in starts], [s.hour for s in starts], [row[1] for row in rows], [row[2] for row in rows]
+        )
+        k = model.weights.size
+        counts = np.bincount(cols.ravel(), minlength=k)
+        step = 1.0 / (0.25 * (cols.shape[1] + 1) * counts + l2)
+        flat = cols.ravel()
+        for _ in range(iterations):
+            residual = _sigmoid(model.intercept + model.weights[cols].sum(axis=1)) - y
+            grad = np.bincount(flat, weights=np.repeat(residual, cols.shape[1]), minlength=k) + l2 * model.weights
+            model.weights -= step * grad
+            model.intercept -= residual.mean() * 4.0 / (cols.shape[1] + 1)
+        return model
+
+    def to_payload(self):
+        return {
+            "room_ids": list(self.room_index), "therapist_ids": list(self.therapist_index),
+            "weights": self.weights.tolist(), "intercept": self.intercept, "base_rate": self.base_rate,
+        }
+
+    @classmethod
+    def from_payload(cls, payload):
+        import numpy as np
+        model = cls(payload["room_ids"], payload["therapist_ids"])
+        model.weights = np.asarray(payload["weights"], dtype=float)
+        model.intercept = payload["intercept"]
+        model.base_rate = payload["base_rate"]
+        return model
+
+    def predict(self, starts, room_ids, therapist_ids):
+        # Per-appointment probabilities
+        cols = self._columns([s.weekday() for s in starts], [s.hour for s in starts], room_ids, therapist_ids)
+        return _sigmoid(self.intercept + self.weights[cols].sum(axis=1))
+
+    def score(self, days, room_ids, therapist_ids):
+        # (days, SLOTS_PER_DAY, rooms, therapists) probabilities in one broadcast
+        import numpy as np
+        w = self.weights
+        weekday = w[self.offsets[0] + np.array([d.weekday() for d in days], dtype=np.int64)]
+        slot_hours = OPEN_HOUR + np.arange(SLOTS_PER_DAY) * SLOT_MINUTES // 60
+        hour = w[self.offsets[1] + _hour_bins(slot_hours)]
+        room = w[self.offsets[2] + self._room_positions(room_ids)]
+        therapist = w[self.offsets[3] + self._therapist_positions(therapist_ids)]
+        logit = (
+            self.intercept
+            + weekday[:, None, None, None]
+            + hour[None, :, None, None]
+            + room[None, None, :, None]
+            + therapist[None, None, None, :]
+        )
+        return _sigmoid(logit)
+
+    def pair_rates(self, day, room_ids, therapist_ids):
+        # Mean probability over the day's slots for each (room_ids[i], therapist_ids[i]) pair
+        import numpy as np
+        w = self.weights
+        slot_hours = OPEN_HOUR + np.arange(SLOTS_PER_DAY) * SLOT_MINUTES // 60
+        pair = w[self.offsets[2] + self._room_positions(room_ids)] + w[self.offsets[3] + self._therapist_positions(therapist_ids)]
+        logit = self.intercept + w[self.offsets[0] + day.weekday()] + w[self.offsets[1] + _hour_bins(slot_hours)][:, None] + pair[None, :]
+        return _sigmoid(logit).mean(axis=0)
+
+def training_rows(db, today, days=TRAINING_DAYS, site_id=DEFAULT_SITE_ID):
+    first = datetime.combine(today - timedelta(days=days), datetime.min.time())
+    last = datetime.combine(today, datetime.min.time())
+    return db.query(Appointment.start_time, Appointment.room_id, Appointment.therapist_id, Appointment.status).filter(
+        Appointment.site_id == site_id,
+        Appointment.start_time >= first,
+        Appointment.start_time < last,
+        # No-shows are the positive label; cancellations say nothing either way
+        or_(Appointment.status.is_(None), Appointment.status != CANCELLED),
+    ).all()
+
+def fit_model(db, today, site_id=DEFAULT_SITE_ID):
+    room_ids = [room_id for (room_id,) in db.query(Room.id).filter(Room.site_id == site_id).order_by(Room.id)]
+    therapist_ids = [t for (t,) in db.query(Employee.id).filter(
+        Employee.site_id == site_id, Employee.is_active.is_(True),
+    ).order_by(Employee.id)]
+    return NoShowModel.fit(training_rows(db, today, site_id=site_id), room_ids, therapist_ids)
+
+def store_model(db, today, site_id=DEFAULT_SITE_ID):
+    # Fit on the site's history up to today and store it; run by fit_no_show_models_task
+    db.merge(ReportSnapshot(
+        site_id=site_id, report_type=MODEL_SNAPSHOT, day=today,
+        payload=fit_model(db, today, site_id).to_payload(), computed_at=datetime.utcnow(), stale=False,
+    ))
+    db.commit()
+
+def has_model(db, today, site_id=DEFAULT_SITE_ID):
+    return db.get(ReportSnapshot, (site_id, MODEL_SNAPSHOT, today)) is not None
+
+def stored_model(db, site_id=DEFAULT_SITE_ID):
+    # (fit day, NoShowModel) of the site's latest stored model, or None
+    row = db.query(ReportSnapshot.day, ReportSnapshot.payload).filter(
+        ReportSnapshot.site_id == site_id, ReportSnapshot.report_type == MODEL_SNAPSHOT,
+    ).order_by(ReportSnapshot.day.desc()).first()
+    if row is None:
+        return None
+    return row.day, NoShowModel.from_payload(row.payload)
+
+class Fitted:
+    # One stored model with the ids it was fitted on and its day score grids.
+    # Never changed once published, apart from caching more day grids.
+    def __init__(self, fitted_on, model):
+        self.fitted_on = fitted_on
+        self.model = model
+        self.room_ids = list(model.room_index)
+        self.therapist_ids = list(model.therapist_index)
+        self.day_scores = {}
+
+class Forecaster:
+    # The latest stored model of one site, held per process. Until today's model
+    # is loaded it looks for a newer one at most every RELOAD_SECONDS, so a
+    # request costs at most one snapshot read and never a fit. Day score grids
+    # are cached per day for the lifetime of that model. Only the swap is locked,
+    # never a DB call: with ASYNC_DB these calls run in run_sync on the event
+    # loop thread, where waiting on a lock held across a query deadlocks.
+    def __init__(self, site_id=DEFAULT_SITE_ID):
+        self.site_id = site_id
+        self.lock = threading.Lock()
+        self.fitted = None
+        self.checked_at = None
+
+    def _refresh(self, db, today):
+        # The current Fitted, or None while the site has no stored model
+        fitted = self.fitted
+        if fitted is not None and fitted.fitted_on >= today:
+            return fitted
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < RELOAD_SECONDS:
+            return fitted
+        stored = stored_model(db, self.site_id)
+        if stored is not None and (fitted is None or stored[0] != fitted.fitted_on):
+            fitted = Fitted(*stored)
+        with self.lock:
+            self.fitted, self.checked_at = fitted, now
+        return fitted
+
+    def scores(self, db, days, today=None):
+        # {day: (SLOTS_PER_DAY, rooms, therapists) array}, or {} without a model;
+        # uncached days are scored together
+        fitted = self._refresh(db, today or date.today())
+        if fitted is None:
+            return {}
+        missing = [day for day in days if day not in fitted.day_scores]
+        if missing:
+            for day, grid in zip(missing, fitted.model.score(missing, fitted.room_ids, fitted.therapist_ids)):
+                fitted.day_scores[day] = grid
+        return {day: fitted.day_scores[day] for day in days}
+
+    def week(self, db, first_day=None, today=None):
+        first_day = first_day or (today or date.today())
+        return self.scores(db, [first_day + timedelta(days=n) for n in range(7)], today)
+
+    def predict(self, db, appointments, today=None):
+        # appointments: rows with start_time, room_id, therapist_id
+        import numpy as np
+        fitted = self._refresh(db, today or date.today())
+        if fitted is None or not appointments:
+            return np.zeros(0)
+        return fitted.model.predict(
+            [a.start_time for a in appointments], [a.room_id for a in appointments], [a.therapist_id for a in appointments]
+        )
+
+forecasters = {}
+_forecasters_lock = threading.Lock()
+
+def forecaster_for(site_id):
+    with _forecasters_lock:
+        if site_id not in forecasters:
+            forecasters[site_id] = Forecaster(site_id)
+        return forecasters[site_id]
+
+def _booked(db, day, site_id):
+    start = datetime.combine(day, datetime.min.time())
+    return db.query(
+        Appointment.id, Appointment.start_time, Appointment.end_time, Appointment.room_id, Appointment.therapist_id
+    ).filter(
+        Appointment.site_id == site_id,
+        Appointment.start_time >= start,
+        Appointment.start_time < start + timedelta(days=1),
+        holds_slot(),
+    ).order_by(Appointment.start_time).all()
+
+def expected_no_show_rate(db, day, site_id=DEFAULT_SITE_ID):
+    # Mean predicted no-show probability of the day's bookings, in percent. Read
+    # from the day's rollups (sessions per room x therapist) like the rest of the
+    # dashboard; rollups do not keep the hour, so each pair's rate is its mean
+    # over the open slots.
+    import numpy as np
+    fitted = forecaster_for(site_id)._refresh(db, date.today())
+    if fitted is None:
+        return 0
+    pairs = rollups.summarize(db, day, day, "room", "therapist", site_id=site_id)
+    sessions = np.array([totals["sessions"] for totals in pairs.values()], dtype=float)
+    if not sessions.sum():
+        return 0
+    rates = fitted.model.pair_rates(day, [room for room, _ in pairs], [therapist for _, therapist in pairs])
+    return round(float(rates @ sessions / sessions.sum()) * 100)
+
+def overbook_candidates(db, day, min_no_show=OVERBOOK_MIN_NO_SHOW, site_id=DEFAULT_SITE_ID):
+    # Scheduler hook: existing bookings likely enough to no-show that a second
+    # client can be offered the same slot, most likely no-shows first
+    booked = _booked(db, day, site_id)
+    probabilities = forecaster_for(site_id).predict(db, booked)
+    candidates = [
+        {
+            "appointment_id": appt.id,
+            "start_time": appt.start_time.isoformat(),
+            "end_time": appt.end_time.isoformat(),
+            "room_id": appt.room_id,
+            "therapist_id": appt.therapist_id,
+            "no_show_probability": round(float(p), 3),
+        }
+        for appt, p in zip(booked, probabilities) if p >= min_no_show
+    ]
+    return sorted(candidates, key=lambda c: -c["no_show_probability"])
+
+def week_forecast(db, first_day, site_id=DEFAULT_SITE_ID):
+    # Per-day summary of the scored week: mean risk and the riskiest slot hours
+    import numpy as np
+    grids = forecaster_for(site_id).week(db, first_day)
+    if not grids:
+        return []
+    days = []
+    for day, grid in grids.items():
+        by_slot = grid.mean(axis=(1, 2)) if grid.size else np.zeros(SLOTS_PER_DAY)
+        riskiest = np.argsort(-by_slot)[:3]
+        days.append({
+            "date": day.isoformat(),
+            "expected_no_show_rate": round(float(grid.mean()) * 100, 1) if grid.size else 0,
+            "riskiest_slots": [
+                (datetime.combine(day, datetime.min.time()) + timedelta(hours=OPEN_HOUR, minutes=int(s) * SLOT_MINUTES)).strftime("%H:%M")
+                for s in riskiest
+            ],
+        })
+    return days
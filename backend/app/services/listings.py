@@ -0,0 +1,174 @@
+# Read models for appointment listings and staff productivity. Each listing is
+# one SELECT of the columns it renders, with therapist, room and patient names
+# joined in, mapped straight to dicts: no ORM objects are built and no lazy
+# relationship loads happen per row, so the query count does not grow with the
+# number of appointments.
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from sqlalchemy import func
+from app.core import scheduler
+from app.models.base import DEFAULT_SITE_ID, RELEASED_STATUSES, Appointment, Client, DailyRollup, Employee, Room
+from app.services import rollups
+from app.services.analytics import calculate_salary_and_commission
+
+MAX_DAYS = 31
+
+def _listing_query(db):
+    return db.query(
+        Appointment.id, Appointment.start_time, Appointment.end_time, Appointment.status, Appointment.revenue,
+        Appointment.therapist_id, Employee.name, Appointment.room_id, Room.name, Appointment.client_id, Client.name,
+    ).outerjoin(Employee, Employee.id == Appointment.therapist_id).outerjoin(
+        Room, Room.id == Appointment.room_id
+    ).outerjoin(Client, Client.id == Appointment.client_id)
+
+def _window(first_day, last_day):
+    if last_day < first_day:
+        raise ValueError("end date is before start date")
+    if (last_day - first_day).days + 1 > MAX_DAYS:
+        raise ValueError(f"listings cover at most {MAX_DAYS} days")
+    return datetime.combine(first_day, time.min), datetime.combine(last_day + timedelta(days=1), time.min)
+
+def appointments(db, first_day, last_day, therapist_ids=None, room_ids=None, status=None, site_id=DEFAULT_SITE_ID):
+    # The site's appointments starting in [first_day, last_day], ordered by start time then room
+    window_start, window_end = _window(first_day, last_day)
+    query = _listing_query(db).filter(
+        Appointment.site_id == site_id, Appointment.start_time >= window_start, Appointment.start_time < window_end,
+    )
+    if therapist_ids:
+        query = query.filter(Appointment.therapist_id.in_(therapist_ids))
+    if room_ids:
+        query = query.filter(Appointment.room_id.in_(room_ids))
+    if status:
+        query = query.filter(Appointment.status == status)
+    rows = query.order_by(Appointment.start_time, Appointment.room_id, Appointment.id).all()
+    # Datetimes are left for the serializer (orjson encodes them natively)
+    return [
+        {
+            "id": id, "start_time": start, "end_time": end, "status": status, "revenue": revenue,
+            "therapist_id": therapist_id, "therapist": therapist, "room_id": room_id, "room": room,
+            "client_id": client_id, "patient": patient,
+        }
+        for id, start, end, status, revenue, therapist_id, therapist, room_id, room, client_id, patient in rows
+    ]
+
+def schedule_entries(db, ids):
+    # Appointments by id in the shape the scheduler view renders (see /api/scheduler)
+    return _schedule_entries(_listing_query(db).filter(Appointment.id.in_(ids)))
+
+def _schedule_entries(query):
+    return _entries(query.order_by(Appointment.start_time, Appointment.id).all())
+
+def _entries(rows):
+    return [
+        {
+            "id": id,
+            "time": _clock(start),
+            "patient": patient,
+            "therapist": therapist,
+            "room": room_id,
+            "type": None,
+            "duration": int((end - start).total_seconds() // 60),
+            "status": status,
+        }
+        for id, start, end, status, revenue, therapist_id, therapist, room_id, room, client_id, patient in rows
+    ]
+
+def _clock(moment):
+    return moment.strftime("%I:%M %p").lstrip("0")
+
+def scheduler_view(db, day, site_id=DEFAULT_SITE_ID):
+    # The scheduler view of a day (/api/scheduler and the feed snapshot) in three
+    # queries: the day's appointments, shaped like schedule_entries so feed
+    # changes merge by id, the site's active therapists and its rooms.
+    # Availability is per half-hour of scheduler.generate_timeslots(): a slot is
+    # free for a therapist or room unless a booking that holds it overlaps it.
+    window_start, window_end = _window(day, day)
+    rows = _listing_query(db).filter(
+        Appointment.site_id == site_id, Appointment.start_time >= window_start, Appointment.start_time < window_end,
+    ).order_by(Appointment.start_time, Appointment.id).all()
+    therapists = db.query(Employee.id, Employee.name, Employee.role).filter(
+        Employee.site_id == site_id, Employee.is_active.is_(True),
+    ).order_by(Employee.id).all()
+    rooms = db.query(Room.id, Room.name).filter(Room.site_id == site_id).order_by(Room.id).all()
+    slots = scheduler.generate_timeslots(day.isoformat())
+    slot_length = slots[1] - slots[0]
+    busy = defaultdict(set)  # ("therapist" | "room", id) -> indexes of busy slots
+    bookings = 0
+    for id, start, end, status, revenue, therapist_id, therapist, room_id, room, client_id, patient in rows:
+        if status in RELEASED_STATUSES:
+            continue
+        bookings += 1
+        covered = {n for n, slot in enumerate(slots) if slot < end and slot + slot_length > start}
+        busy["therapist", therapist_id] |= covered
+        busy["room", room_id] |= covered
+    free_therapists = {id: [n for n in range(len(slots)) if n not in busy["therapist", id]] for id, _, _ in therapists}
+    free_rooms = {id: [n for n in range(len(slots)) if n not in busy["room", id]] for id, _ in rooms}
+    # Slots where some therapist and some room are both free
+    open_slots = set().union(*free_therapists.values()) & set().union(*free_rooms.values())
+    # The three therapists free soonest, each at their earliest open slot in the first free room
+    room_names = dict(rooms)
+    earliest = sorted(
+        (min(open_slots.intersection(free_therapists[id]), default=len(slots)), id, name) for id, name, _ in therapists
+    )
+    suggestions = []
+    for n, id, name in earliest[:3]:
+        if n == len(slots):
+            break
+        room_id = next(room_id for room_id, free in free_rooms.items() if n in free)
+        suggestions.append({"time": _clock(slots[n]), "therapist": name, "room": room_id, "reason": f"{room_names[room_id]} is free"})
+    room_utilization = {id: round(len(busy["room", id]) / len(slots) * 100) for id, _ in rooms}
+    return {
+        "stats": {
+            "bookings": bookings,
+            "availableSlots": len(open_slots),
+            "activeTherapists": sum(bool(busy["therapist", id]) for id, _, _ in therapists),
+            "utilization": round(sum(len(busy["room", id]) for id, _ in rooms) / (len(rooms) * len(slots)) * 100) if rooms else 0,
+        },
+        "therapists": [
+            {
+                "id": id, "name": name, "type": getattr(role, "value", role).replace("_", " ").title(),
+                "available": bool(free_therapists[id]),
+                "nextAvailable": _clock(slots[free_therapists[id][0]]) if free_therapists[id] else None,
+            }
+            for id, name, role in therapists
+        ],
+        "appointments": _entries(rows),
+        "rooms": [{"id": id, "name": name, "status": "active", "utilization": room_utilization[id]} for id, name in rooms],
+        "suggestions": suggestions,
+    }
+
+def productivity(db, first_day, last_day, site_id=DEFAULT_SITE_ID):
+    # Sessions, revenue, booked time and commission per active employee of the site over
+    # [first_day, last_day], from the daily rollups in one query. The rollups are
+    # summed per therapist first, off a (site_id, day) range scan, so the cost
+    # follows this site's rows and not every site's.
+    _window(first_day, last_day)
+    days = (last_day - first_day).days + 1
+    totals = db.query(
+        DailyRollup.therapist_id,
+        func.sum(DailyRollup.sessions).label("sessions"),
+        func.sum(DailyRollup.revenue).label("revenue"),
+        func.sum(DailyRollup.booked_minutes).label("booked_minutes"),
+    ).filter(
+        DailyRollup.site_id == site_id, DailyRollup.day.between(first_day, last_day)
+    ).group_by(DailyRollup.therapist_id).subquery()
+    rows = db.query(
+        Employee.id, Employee.name, Employee.role, Employee.fixed_salary, Employee.commission_rate,
+        func.coalesce(totals.c.sessions, 0),
+        func.coalesce(totals.c.revenue, 0.0),
+        func.coalesce(totals.c.booked_minutes, 0),
+    ).outerjoin(totals, totals.c.therapist_id == Employee.id).filter(
+        Employee.site_id == site_id, Employee.is_active.is_(True)
+    ).order_by(Employee.id).all()
+    capacity = rollups.OPEN_MINUTES_PER_DAY * days
+    result = []
+    for id, name, role, fixed_salary, commission_rate, sessions, revenue, minutes in rows:
+        role = getattr(role, "value", role)
+        commission = calculate_salary_and_commission(role, revenue, fixed_salary or 0.0, commission_rate or 0.0)[1]
+        result.append({
+            "id": id, "name": name, "role": role, "sessions": sessions, "revenue": revenue,
+            "booked_minutes": minutes, "utilization": round(minutes / capacity * 100), "commission": commission,
+            "avg_session_value": round(revenue / sessions) if sessions else 0,
+        })
+    return result
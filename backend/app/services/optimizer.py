@@ -0,0 +1,55 @@
+# Batch assignment of a day's pending requests (e.g. tomorrow's waitlist) with
+# scheduler.optimize_batch, for the "optimize tomorrow" action and
+# optimize_batch_task. Loading the day is the only DB work; the solve is pure
+# CPU, so the async route runs it off the event loop. Nothing is booked: the
+# caller books the assignments it accepts through the booking endpoints.
+
+from datetime import datetime, timedelta
+from app.core import scheduler
+from app.models.base import Appointment, Employee, Room, holds_slot
+from app.services import sites
+
+def _slots_of(start, end, slot_minutes=30):
+    # Half-hour slot starts a booking covers
+    slot = start.replace(minute=start.minute - start.minute % slot_minutes, second=0, microsecond=0)
+    while slot < end:
+        yield slot
+        slot += timedelta(minutes=slot_minutes)
+
+def load_day(db, site_id, day):
+    # The site's rules, active therapist and room ids, and the day's bookings as
+    # one scheduler appointment per half-hour they cover, so the room-share
+    # rules weigh bookings by length
+    day_start = datetime.combine(day, datetime.min.time())
+    rules = sites.scheduler_rules(db, site_id)
+    therapists = [id for (id,) in db.query(Employee.id).filter(
+        Employee.site_id == site_id, Employee.is_active.is_(True),
+    ).order_by(Employee.id)]
+    rooms = [id for (id,) in db.query(Room.id).filter(Room.site_id == site_id).order_by(Room.id)]
+    rows = db.query(Appointment.start_time, Appointment.end_time, Appointment.therapist_id, Appointment.room_id).filter(
+        Appointment.site_id == site_id,
+        Appointment.start_time >= day_start,
+        Appointment.start_time < day_start + timedelta(days=1),
+        holds_slot(),
+    ).all()
+    appointments = [
+        {"slot": slot, "therapist": therapist, "room": room}
+        for start, end, therapist, room in rows for slot in _slots_of(start, end)
+    ]
+    return {"day": day, "rules": rules, "therapists": therapists, "rooms": rooms, "appointments": appointments}
+
+def solve(loaded, requests):
+    # One {"slot", "therapist", "room"} (or None) per {"therapist"?: employee id,
+    # "room"?: room id} request. ValueError for a therapist or room that is not
+    # an active one of the site.
+    for key, known in (("therapist", loaded["therapists"]), ("room", loaded["rooms"])):
+        unknown = {request[key] for request in requests if request.get(key) is not None} - set(known)
+        if unknown:
+            raise ValueError(f"unknown {key} {min(unknown)}")
+    return scheduler.optimize_batch(
+        requests, loaded["appointments"], loaded["therapists"], loaded["rooms"],
+        loaded["day"].isoformat(), rules=loaded["rules"],
+    )
+
+def optimize_day(db, site_id, day, requests):
+    return solve(load_day(db, site_id, day), requests)
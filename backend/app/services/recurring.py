@@ -0,0 +1,184 @@
+# Recurring bookings for treatment packages. The recurrence rule is expanded
+# into occurrences, and the therapist's and rooms' bookings on every occurrence
+# day are loaded with one query. Conflicts and same-day alternatives (the
+# scheduler's closest_free_slot) are worked out in memory. The accepted series
+# goes in with one executemany insert in one transaction, so a 52-week series
+# costs the same handful of round-trips as a single booking.
+
+from datetime import datetime, time, timedelta
+from sqlalchemy import and_, insert, or_
+from app.core import partitions, scheduler
+from app.models.base import Appointment, holds_slot
+from app.services import rollups, snapshots
+from app.services.booking import announce_bookings, booking_site, commit_booking, serialize_booking
+
+MAX_OCCURRENCES = 104
+FREQUENCIES = {"daily": 1, "weekly": 7}
+CONFLICT_POLICIES = ("reject", "skip", "reschedule")
+
+class SeriesConflict(Exception):
+    def __init__(self, occurrences):
+        self.occurrences = occurrences
+        conflicts = sum(1 for occurrence in occurrences if occurrence["status"] == "conflict")
+        super().__init__(f"{conflicts} of {len(occurrences)} occurrences conflict with existing bookings.")
+
+def expand(start_time, end_time, frequency="weekly", interval=1, count=None, until=None, weekdays=None):
+    # (start, end) of every occurrence, starting with (start_time, end_time)
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"frequency must be one of {', '.join(FREQUENCIES)}")
+    if end_time <= start_time or end_time.date() != start_time.date():
+        raise ValueError("an occurrence must end after it starts, on the same day")
+    if interval < 1:
+        raise ValueError("interval must be at least 1")
+    if count is None and until is None:
+        raise ValueError("give a count or an until date")
+    if count is not None and not 1 <= count <= MAX_OCCURRENCES:
+        raise ValueError(f"count must be between 1 and {MAX_OCCURRENCES}")
+    if weekdays and (frequency != "weekly" or any(not 0 <= day <= 6 for day in weekdays)):
+        raise ValueError("weekdays apply to weekly series and must be 0 (Monday) to 6")
+    duration = end_time - start_time
+    if frequency == "weekly" and weekdays:
+        week = start_time - timedelta(days=start_time.weekday())
+        offsets = sorted(set(weekdays))
+    else:
+        week, offsets = start_time, [0]
+    step = timedelta(days=FREQUENCIES[frequency] * interval)
+    occurrences = []
+    while True:
+        for offset in offsets:
+            start = week + timedelta(days=offset)
+            if start < start_time:
+                continue
+            if (until is not None and start.date() > until) or (count is not None and len(occurrences) == count):
+                if not occurrences:
+                    raise ValueError("the rule has no occurrences")
+                return occurrences
+            if len(occurrences) == MAX_OCCURRENCES:
+                raise ValueError(f"a series has at most {MAX_OCCURRENCES} occurrences")
+            occurrences.append((start, start + duration))
+        week += step
+
+def load_busy(db, therapist_id, room_ids, days):
+    # {day: (therapist busy intervals, {room_id: busy intervals})} for the given
+    # days, from one query. One OR branch per resource x day, so each branch is
+    # a range scan on the (therapist|room, start_time, end_time) indexes.
+    day_starts = [datetime.combine(day, time.min) for day in days]
+    resources = (Appointment.therapist_id == therapist_id, Appointment.room_id.in_(room_ids))
+    rows = db.query(
+        Appointment.therapist_id, Appointment.room_id, Appointment.start_time, Appointment.end_time
+    ).filter(or_(*(
+        and_(
+            resource,
+            Appointment.start_time > day_start - timedelta(days=1),
+            Appointment.start_time < day_start + timedelta(days=1),
+            Appointment.end_time > day_start,
+        )
+        for resource in resources for day_start in day_starts
+    )), holds_slot()).all()
+    busy = {day: ([], {room_id: [] for room_id in room_ids}) for day in days}
+    for row_therapist, row_room, start, end in rows:
+        # A booking crossing midnight counts on both of its days
+        for day in {start.date(), (end - timedelta(microseconds=1)).date()}:
+            if day not in busy:
+                continue
+            therapist_busy, room_busy = busy[day]
+            if row_therapist == therapist_id:
+                therapist_busy.append((start, end))
+            if row_room in room_busy:
+                room_busy[row_room].append((start, end))
+    return busy
+
+def _overlaps(intervals, start, end):
+    return any(busy_start < end and busy_end > start for busy_start, busy_end in intervals)
+
+def series_rooms(payload):
+    return [payload.room_id] + [r for r in (payload.alternative_room_ids or []) if r != payload.room_id]
+
+def plan_series(db, payload, occurrences, start_hour=8, end_hour=18):
+    # One entry per occurrence: "free", or "conflict" with the clashing resource
+    # and the closest free same-day slot in the requested or alternative rooms
+    rooms = series_rooms(payload)
+    busy = load_busy(db, payload.therapist_id, rooms, [start.date() for start, _ in occurrences])
+    plan = []
+    for start, end in occurrences:
+        therapist_busy, room_busy = busy[start.date()]
+        occurrence = {"start_time": start, "end_time": end, "room_id": payload.room_id, "status": "free"}
+        if _overlaps(room_busy[payload.room_id], start, end):
+            conflict = "room"
+        elif _overlaps(therapist_busy, start, end):
+            conflict = "therapist"
+        else:
+            plan.append(occurrence)
+            continue
+        day_start = start.replace(hour=start_hour, minute=0, second=0, microsecond=0)
+        found = scheduler.closest_free_slot(
+            start, end - start, therapist_busy, room_busy, rooms, day_start, day_start.replace(hour=end_hour),
+        )
+        alternative = None
+        if found is not None:
+            alt_start, alt_room = found
+            alternative = {"start_time": alt_start, "end_time": alt_start + (end - start), "room_id": alt_room}
+        occurrence.update(status="conflict", conflict=conflict, alternative=alternative)
+        plan.append(occurrence)
+    return plan
+
+def book_series(db, payload):
+    # Expand, check and book a recurring series. With on_conflict="reject" any
+    # conflict books nothing and raises SeriesConflict; "skip" books the free
+    # occurrences; "reschedule" also books conflicting ones at their alternative.
+    # dry_run returns the plan without booking.
+    if payload.on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict must be one of {', '.join(CONFLICT_POLICIES)}")
+    occurrences = expand(
+        payload.start_time, payload.end_time, payload.frequency, payload.interval,
+        payload.count, payload.until, payload.weekdays,
+    )
+    serialize_booking(db)
+    # The alternative rooms must be in the same site as the therapist and room
+    site_id = booking_site(db, payload.therapist_id, series_rooms(payload))
+    plan = plan_series(db, payload, occurrences)
+    has_conflicts = any(occurrence["status"] == "conflict" for occurrence in plan)
+    if payload.dry_run or (has_conflicts and payload.on_conflict == "reject"):
+        db.rollback()
+        if not payload.dry_run:
+            raise SeriesConflict(plan)
+        return {"booked": 0, "occurrences": plan}
+
+    rows, booked = [], []
+    for occurrence in plan:
+        slot = occurrence
+        if occurrence["status"] == "conflict":
+            if payload.on_conflict != "reschedule" or occurrence["alternative"] is None:
+                occurrence["status"] = "skipped"
+                continue
+            slot = occurrence["alternative"]
+            occurrence["status"] = "rescheduled"
+        else:
+            occurrence["status"] = "booked"
+        rows.append({
+            "site_id": site_id, "therapist_id": payload.therapist_id, "client_id": payload.client_id, "room_id": slot["room_id"],
+            "start_time": slot["start_time"], "end_time": slot["end_time"],
+            "revenue": payload.revenue, "status": payload.status,
+        })
+        booked.append(occurrence)
+    if not rows:
+        db.rollback()
+        return {"booked": 0, "occurrences": plan}
+
+    starts = [row["start_time"] for row in rows]
+    partitions.ensure_partitions(db.connection(), min(starts).date(), max(starts).date())
+    # Unordered RETURNING stays one batched statement (ordered RETURNING degrades
+    # to a statement per row on SQLite); the series' start times are distinct,
+    # so they map the returned ids back to the rows just inserted
+    id_of = {start: id for id, start in db.execute(
+        insert(Appointment).returning(Appointment.id, Appointment.start_time), rows,
+    )}
+    ids = [id_of[row["start_time"]] for row in rows]
+    for occurrence, id in zip(booked, ids):
+        occurrence["id"] = id
+    days = sorted({row["start_time"].date() for row in rows})
+    rollups.apply_appointments(db, rows)
+    snapshots.mark_stale(db, days, site_id)
+    commit_booking(db)
+    announce_bookings(db, site_id, {id: row["start_time"].date() for id, row in zip(ids, rows)})
+    return {"booked": len(rows), "occurrences": plan}
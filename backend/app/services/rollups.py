@@ -0,0 +1,123 @@
+# Incremental per-day x room x therapist aggregates of appointments.
+# Booking writes call apply_appointment() in the same transaction and the
+# periodic refresh_rollups_task rebuilds whole days, so analytics reads cost
+# O(rooms x therapists) per day instead of a scan over appointments.
+# Cancelled and no-show appointments are left out.
+
+from datetime import datetime, time, timedelta
+from sqlalchemy import func
+from app.models.base import DEFAULT_SITE_ID, RELEASED_STATUSES, Appointment, DailyRollup, holds_slot
+
+# Matches the scheduler's default 8:00-18:00 working day
+OPEN_MINUTES_PER_DAY = (18 - 8) * 60
+
+_GROUPS = {
+    "day": DailyRollup.day,
+    "room": DailyRollup.room_id,
+    "therapist": DailyRollup.therapist_id,
+}
+
+def _minutes(start, end):
+    return int((end - start).total_seconds() // 60)
+
+def _upsert_insert(db):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+def apply_appointment(db, appointment, sign=1):
+    # Add (sign=1) or remove (sign=-1) one appointment from its day's rollup row
+    apply_appointments(db, [{
+        "site_id": appointment.site_id, "room_id": appointment.room_id, "therapist_id": appointment.therapist_id,
+        "start_time": appointment.start_time, "end_time": appointment.end_time, "revenue": appointment.revenue,
+        "status": appointment.status,
+    }], sign)
+
+def apply_appointments(db, rows, sign=1):
+    # apply_appointment() for many appointment column dicts: rows sharing a
+    # day x room x therapist are summed first, then upserted in one executemany
+    totals = {}
+    for row in rows:
+        if row.get("status") in RELEASED_STATUSES:
+            continue
+        key = (row["start_time"].date(), row["room_id"], row["therapist_id"])
+        values = totals.setdefault(key, {
+            "day": key[0], "room_id": key[1], "therapist_id": key[2], "site_id": row["site_id"],
+            "sessions": 0, "revenue": 0.0, "booked_minutes": 0,
+        })
+        values["sessions"] += sign
+        values["revenue"] += sign * (row.get("revenue") or 0.0)
+        values["booked_minutes"] += sign * _minutes(row["start_time"], row["end_time"])
+    if not totals:
+        return
+    insert = _upsert_insert(db)
+    if insert is None:
+        for key, values in totals.items():
+            existing = db.get(DailyRollup, key)
+            if existing is None:
+                db.add(DailyRollup(**values))
+            else:
+                existing.sessions += values["sessions"]
+                existing.revenue += values["revenue"]
+                existing.booked_minutes += values["booked_minutes"]
+        return
+    stmt = insert(DailyRollup)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DailyRollup.day, DailyRollup.room_id, DailyRollup.therapist_id],
+        set_={
+            "sessions": DailyRollup.sessions + stmt.excluded.sessions,
+            "revenue": DailyRollup.revenue + stmt.excluded.revenue,
+            "booked_minutes": DailyRollup.booked_minutes + stmt.excluded.booked_minutes,
+        },
+    ), list(totals.values()))
+
+def refresh_days(db, days, site_id=None):
+    # Rebuild the rollup rows of the given days from the appointments table,
+    # for one site or (site_id=None) all of them
+    for day in days:
+        day_start = datetime.combine(day, time.min)
+        stale = db.query(DailyRollup).filter(DailyRollup.day == day)
+        rows = db.query(
+            Appointment.site_id, Appointment.room_id, Appointment.therapist_id,
+            Appointment.start_time, Appointment.end_time, Appointment.revenue,
+        ).filter(
+            Appointment.start_time >= day_start, Appointment.start_time < day_start + timedelta(days=1), holds_slot(),
+        )
+        if site_id is not None:
+            stale = stale.filter(DailyRollup.site_id == site_id)
+            rows = rows.filter(Appointment.site_id == site_id)
+        stale.delete(synchronize_session=False)
+        totals = {}
+        for row_site, room_id, therapist_id, start, end, revenue in rows:
+            row = totals.setdefault((room_id, therapist_id), {
+                "day": day, "room_id": room_id, "therapist_id": therapist_id, "site_id": row_site,
+                "sessions": 0, "revenue": 0.0, "booked_minutes": 0,
+            })
+            row["sessions"] += 1
+            row["revenue"] += revenue or 0.0
+            row["booked_minutes"] += _minutes(start, end)
+        if totals:
+            db.execute(DailyRollup.__table__.insert(), list(totals.values()))
+
+def summarize(db, first_day, last_day, *by, site_id=DEFAULT_SITE_ID):
+    # Sum one site's rollup rows over [first_day, last_day] grouped by any of day/room/therapist
+    keys = [_GROUPS[name] for name in by]
+    rows = db.query(
+        *keys,
+        func.sum(DailyRollup.sessions),
+        func.sum(DailyRollup.revenue),
+        func.sum(DailyRollup.booked_minutes),
+    ).filter(
+        DailyRollup.site_id == site_id, DailyRollup.day >= first_day, DailyRollup.day <= last_day,
+    ).group_by(*keys).all()
+    result = {}
+    for row in rows:
+        key = row[0] if len(keys) == 1 else tuple(row[:len(keys)])
+        sessions, revenue, minutes = row[len(keys):]
+        result[key] = {"sessions": sessions or 0, "revenue": revenue or 0.0, "booked_minutes": minutes or 0}
+    return result
@@ -0,0 +1,45 @@
+# Site lookups shared by the booking, scheduler and task code.
+
+from sqlalchemy import true
+from app.models.base import Employee, RoleEnum, Room, Site
+
+def active_site_ids(db):
+    return [id for (id,) in db.query(Site.id).filter(Site.is_active.is_(True)).order_by(Site.id)]
+
+def scheduler_rules(db, site_id):
+    # The site's scheduler rules in the form app.core.scheduler reads ({} when it
+    # has none). Sites store {"shared_rooms": {room id: {employee id: share}},
+    # "max_rooms": {role: n}}; the role limits are resolved here to the site's
+    # employees of that role. ValueError for an unknown role.
+    stored = db.query(Site.scheduler_rules).filter(Site.id == site_id).scalar() or {}
+    rules = {}
+    if stored.get("shared_rooms"):
+        # JSON object keys come back as strings
+        rules["shared_rooms"] = {
+            int(room_id): {int(employee_id): share for employee_id, share in shares.items()}
+            for room_id, shares in stored["shared_rooms"].items()
+        }
+    if stored.get("max_rooms"):
+        limits = {RoleEnum(role): limit for role, limit in stored["max_rooms"].items()}
+        rules["max_rooms"] = {
+            employee_id: limits[role] for employee_id, role in db.query(Employee.id, Employee.role).filter(
+                Employee.site_id == site_id, Employee.role.in_(limits),
+            )
+        }
+    return rules
+
+def booking_site(db, therapist_id, room_ids):
+    # Site of a booking for `therapist_id` in any of `room_ids`, in one query.
+    # ValueError if the therapist or a room does not exist or they span sites.
+    rows = db.query(Employee.site_id, Room.id, Room.site_id).select_from(Employee).join(Room, true()).filter(
+        Employee.id == therapist_id, Room.id.in_(room_ids),
+    ).all()
+    if not rows:
+        raise ValueError("unknown therapist or room")
+    missing = set(room_ids) - {room_id for _, room_id, _ in rows}
+    if missing:
+        raise ValueError(f"unknown room {min(missing)}")
+    site_ids = {site_id for therapist_site, _, room_site in rows for site_id in (therapist_site, room_site)}
+    if len(site_ids) > 1:
+        raise ValueError("the therapist and rooms belong to different sites")
+    return site_ids.pop()
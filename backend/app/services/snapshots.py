@@ -0,0 +1,60 @@
+# Stored report snapshots so /api/reports and the report emails read a
+# precomputed payload instead of re-running the aggregation per request.
+
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app.models.base import DEFAULT_SITE_ID, ReportSnapshot
+from app.services import reports
+
+REPORT_TYPES = ("daily", "weekly")
+
+def store_snapshot(db, report_type, day, site_id=DEFAULT_SITE_ID):
+    payload = reports.build_report(db, report_type, day, site_id)
+    db.merge(ReportSnapshot(
+        site_id=site_id, report_type=report_type, day=day, payload=payload, computed_at=datetime.utcnow(), stale=False,
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent reader stored the same snapshot first
+        db.rollback()
+    return payload
+
+def get_or_build(db, report_type, day, site_id=DEFAULT_SITE_ID):
+    # Serve the site's stored snapshot; build and store it when missing or stale
+    if report_type not in REPORT_TYPES:
+        return reports.build_report(db, report_type, day, site_id)
+    snapshot = db.get(ReportSnapshot, (site_id, report_type, day))
+    if snapshot is not None and not snapshot.stale:
+        return snapshot.payload
+    return store_snapshot(db, report_type, day, site_id)
+
+def _day_ranges(dates, lookback):
+    # Merged [first, last] ranges of snapshot days whose source dates include one of `dates`
+    ranges = []
+    for day in sorted(set(dates)):
+        if ranges and day <= ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day + lookback
+        else:
+            ranges.append([day, day + lookback])
+    return ranges
+
+def mark_stale(db, dates, site_id=DEFAULT_SITE_ID):
+    # Flag every stored snapshot of the site whose source dates include one of `dates`;
+    # runs in the caller's transaction, one UPDATE per report type touching only those rows
+    for report_type in REPORT_TYPES:
+        ranges = _day_ranges(dates, timedelta(days=reports.LOOKBACK_DAYS[report_type]))
+        if not ranges:
+            return
+        db.query(ReportSnapshot).filter(
+            ReportSnapshot.site_id == site_id,
+            ReportSnapshot.report_type == report_type,
+            or_(*(ReportSnapshot.day.between(first, last) for first, last in ranges)),
+            ReportSnapshot.stale.is_(False),
+        ).update({ReportSnapshot.stale: True}, synchronize_session=False)
+
+def stale_snapshots(db, site_id=DEFAULT_SITE_ID):
+    return db.query(ReportSnapshot.report_type, ReportSnapshot.day).filter(
+        ReportSnapshot.site_id == site_id, ReportSnapshot.stale.is_(True),
+    ).all()
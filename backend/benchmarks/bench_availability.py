@@ -0,0 +1,41 @@
+# Availability search: time to first hit and to the full (limited) result set
+# as the search window grows, against a year of appointments.
+# Run from backend/: python -m benchmarks.bench_availability
+
+import time
+from datetime import date, timedelta
+
+from app.models.base import Employee, Room, RoleEnum
+from app.services import availability
+from benchmarks.bench_suggest_slot import make_session
+
+def add_resources(db, n_therapists=26, n_rooms=15):
+    roles = list(RoleEnum)
+    db.add_all(Employee(name=f"T{i}", role=roles[i % len(roles)], email=f"t{i}@example.com") for i in range(1, n_therapists + 1))
+    db.add_all(Room(name=f"Room {i}") for i in range(1, n_rooms + 1))
+    db.commit()
+
+def main(repeat=20):
+    engine, db = make_session(60_000)
+    add_resources(db)
+    first_day = date(2025, 6, 2)
+    print(f"{'days':>5} {'limit':>6} {'first ms':>9} {'total ms':>9} {'hits':>6}")
+    for days in (1, 7, 14, 31):
+        for limit in (200, availability.MAX_RESULTS):
+            first = total = 0.0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                hits = availability.search_availability(
+                    db, first_day, first_day + timedelta(days=days - 1), 60, roles=[RoleEnum.associate], limit=limit,
+                )
+                count = 0
+                for _ in hits:
+                    if count == 0:
+                        first += time.perf_counter() - t0
+                    count += 1
+                total += time.perf_counter() - t0
+            print(f"{days:>5} {limit:>6} {first / repeat * 1000:>9.2f} {total / repeat * 1000:>9.2f} {count:>6}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Parallel manual-book stress test on a file-backed SQLite database.
+# Reports double bookings and p99 latency as the appointments table grows.
+# Run from backend/: python -m benchmarks.bench_booking_concurrency
+
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.api.appointments import manual_book_appointment
+from app.core.database import Base, create_db_engine
+from app.models.base import Appointment
+from app.schemas.appointment import AppointmentManualCreate
+
+THREADS = 16
+ATTEMPTS = 400
+
+def seed(engine, n, rng):
+    first_day = datetime(2024, 1, 1, 8)
+    rows = []
+    for i in range(n):
+        start = first_day + timedelta(days=i // 300, minutes=30 * (i % 20))
+        rows.append({
+            "therapist_id": 100 + (i // 20) % 15, "client_id": 1, "room_id": 100 + (i // 20) % 15,
+            "start_time": start, "end_time": start + timedelta(minutes=30), "revenue": 100.0,
+        })
+    with engine.begin() as conn:
+        if rows:
+            conn.execute(Appointment.__table__.insert(), rows)
+
+def run(n_existing):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(n_existing)
+    seed(engine, n_existing, rng)
+    day = datetime(2026, 3, 2, 8)
+
+    def attempt(i):
+        start = day + timedelta(minutes=30 * rng.randrange(8))
+        payload = AppointmentManualCreate(
+            therapist_id=rng.randrange(1, 4), client_id=1, room_id=rng.randrange(1, 4),
+            start_time=start, end_time=start + timedelta(minutes=rng.choice((30, 60))),
+        )
+        db = Session()
+        t0 = time.perf_counter()
+        try:
+            manual_book_appointment(payload, db)
+        except HTTPException:
+            pass
+        finally:
+            db.close()
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        latencies = sorted(pool.map(attempt, range(ATTEMPTS)))
+    with engine.connect() as conn:
+        overlaps = conn.execute(text(
+            "SELECT count(*) FROM appointments a JOIN appointments b ON a.id < b.id "
+            "AND (a.room_id = b.room_id OR a.therapist_id = b.therapist_id) "
+            "AND a.start_time < b.end_time AND a.end_time > b.start_time"
+        )).scalar()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{n_existing:>10} {p99:>8.1f} {overlaps:>13}")
+
+def main():
+    print(f"{'existing':>10} {'p99 ms':>8} {'double-books':>13}")
+    for n in (0, 10_000, 100_000):
+        run(n)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# Scheduler, booking and report suite over the synthetic clinic (benchmarks/clinic.py)
+# at 1x, 10x and 100x its size. Covers:
+# - generate_timeslots and the in-memory suggest_slots
+# - the DB-backed suggest_slot
+# - smart-book, manual-book and recurring through the app via TestClient
+# - the dashboard/analytics/daily/weekly reports, staff productivity and payroll
+# Each case records its time and query count; the growth column shows which path
+# degrades first as the clinic grows.
+# Compared against benchmarks/clinic_baseline.json. The run fails when any case
+# issues more queries than its baseline, or is slower than tolerance x baseline.
+# Timings are only comparable on the machine that recorded the baseline;
+# re-record with --save-baseline when that changes.
+# This is a script like the rest of benchmarks/, not a pytest-benchmark suite:
+# the backend has no pytest setup or test suite to hang one on, and
+# pytest-benchmark's saved runs compare timings only, while the query-count
+# check here is the one that holds across machines.
+# Run from backend/: python -m benchmarks.bench_clinic [--scales 1,10,100] [--save-baseline]
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clinic_baseline.json")
+# Slowdowns below this many ms are noise, whatever the ratio
+NOISE_FLOOR_MS = 1.0
+
+def timed(call, repeat):
+    # Best of `repeat` calls of a read-only case, in ms
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def run_scale(scale, args, workdir):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from sqlalchemy.orm import sessionmaker
+    from app.core import database, scheduler
+    from app.main import app
+    from app.schemas.appointment import AppointmentCreate
+    from app.services import analytics, forecasting, listings, reports
+    from benchmarks import clinic
+
+    t0 = time.perf_counter()
+    data = clinic.generate(scale, args.months, args.seed)
+    generated = time.perf_counter() - t0
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(workdir, f'clinic-{scale}x.db')}")
+    clinic.load(engine, data)
+    loaded = time.perf_counter() - t0 - generated
+    print(f"{scale}x: {len(data['rooms'])} rooms, {len(data['employees'])} staff, "
+          f"{len(data['appointments'])} appointments (generated in {generated:.1f}s, loaded in {loaded:.1f}s)")
+
+    # The busiest day of the period, and a free week after it for new bookings
+    day = clinic.busiest_day(data)
+    free_day = data["days"][-1] + timedelta(days=7 - data["days"][-1].weekday())
+    names = {e["id"]: e["name"] for e in data["employees"]}
+    rooms = {r["id"]: r["name"] for r in data["rooms"]}
+    month = [
+        {"slot": a["start_time"], "therapist": names[a["therapist_id"]], "room": rooms[a["room_id"]]}
+        for a in data["appointments"] if a["start_time"].year == day.year and a["start_time"].month == day.month
+    ]
+    del data
+
+    Session = sessionmaker(bind=engine, autoflush=False)
+    queries = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.__setitem__(0, queries[0] + 1))
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def read(build):
+        # A report built on a fresh session each call, so nothing is cached in the identity map
+        def call():
+            db = Session()
+            try:
+                return build(db)
+            finally:
+                db.close()
+        return call
+
+    def measure(call, repeat):
+        # One untimed call first for lazy imports and first-use caches
+        call()
+        before = queries[0]
+        ms = timed(call, repeat)
+        return {"ms": ms, "queries": round((queries[0] - before) / repeat)}
+
+    def bookings(path, payloads):
+        # Each payload books once; median latency per request. Conflicts and
+        # "no slot" answers are valid outcomes on the busiest day
+        times, before = [], queries[0]
+        for payload in payloads:
+            t0 = time.perf_counter()
+            response = client.post(path, json=payload)
+            times.append(time.perf_counter() - t0)
+            if response.status_code not in (200, 400, 409):
+                sys.exit(f"{path} returned {response.status_code}: {response.text}")
+        return {"ms": statistics.median(times) * 1000, "queries": round((queries[0] - before) / len(payloads))}
+
+    def slot(start, minutes=60):
+        return {"start_time": start.isoformat(), "end_time": (start + timedelta(minutes=minutes)).isoformat()}
+
+    day_str = day.isoformat()
+    peak = datetime.combine(day, datetime.min.time()).replace(hour=17)
+    first_free = datetime.combine(free_day, datetime.min.time())
+    request = {"date": day_str, "therapist": names[4], "room": rooms[4]}
+    suggest_payload = AppointmentCreate(therapist_id=4, client_id=1, room_id=4, **{
+        key: datetime.fromisoformat(value) for key, value in slot(peak).items()
+    })
+    results = {
+        "generate_timeslots": measure(lambda: scheduler.generate_timeslots(day_str), args.repeat * 20),
+        "suggest_slots": measure(lambda: scheduler.suggest_slots(month, list(names.values()), list(rooms.values()), request), args.repeat),
+        "suggest_slot": measure(read(lambda db: scheduler.suggest_slot(suggest_payload, db, room_ids=[5, 6, 7])), args.repeat),
+    }
+    del month
+    app.dependency_overrides[database.get_db] = get_db
+    with TestClient(app) as client:
+        # Distinct therapists and rooms per request, so every booking is a fresh one
+        results["smart-book"] = bookings("/api/appointments/smart-book", [
+            {"therapist_id": n, "client_id": 1, "room_id": n, "revenue": 850, **slot(peak)}
+            for n in range(1, args.repeat + 1)
+        ])
+        results["manual-book"] = bookings("/api/appointments/manual-book", [
+            {"therapist_id": n, "client_id": 1, "room_id": n, "revenue": 850, **slot(first_free.replace(hour=10))}
+            for n in range(1, args.repeat + 1)
+        ])
+        results["recurring x12"] = bookings("/api/appointments/recurring", [
+            {"therapist_id": n, "client_id": 1, "room_id": n, "revenue": 850, "count": 12, **slot(first_free.replace(hour=14))}
+            for n in range(1, args.repeat + 1)
+        ])
+    app.dependency_overrides.clear()
+
+    first_of_month = day.replace(day=1)
+    last_of_month = (first_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    # The no-show model is fitted by fit_no_show_models_task, off the request path;
+    # fitted here on this clinic's history, then stored once for the reports to read
+    results["no-show model fit"] = measure(read(lambda db: forecasting.fit_model(db, day)), args.repeat)
+    read(lambda db: forecasting.store_model(db, day))()
+    forecasting.forecasters.clear()
+    results.update({
+        "dashboard": measure(read(lambda db: reports.build_dashboard(db, day)), args.repeat),
+        "analytics": measure(read(lambda db: reports.build_analytics(db, day)), args.repeat),
+        "daily report": measure(read(lambda db: reports.build_daily_report(db, day)), args.repeat),
+        "weekly report": measure(read(lambda db: reports.build_weekly_report(db, day)), args.repeat),
+        "productivity": measure(read(lambda db: listings.productivity(db, first_of_month, last_of_month)), args.repeat),
+        "payroll": measure(read(lambda db: analytics.monthly_payroll(db, first_of_month, last_of_month)), args.repeat),
+    })
+    engine.dispose()
+    return results
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for scale, cases in results.items():
+        for name, result in cases.items():
+            base = baseline["results"].get(scale, {}).get(name)
+            if base is None:
+                continue
+            if result["queries"] > base["queries"]:
+                failures.append(f"{scale}x {name}: {result['queries']} queries, baseline {base['queries']}")
+            if result["ms"] > base["ms"] * tolerance and result["ms"] - base["ms"] > NOISE_FLOOR_MS:
+                failures.append(f"{scale}x {name}: {result['ms']:.2f}ms, baseline {base['ms']:.2f}ms")
+    return failures
+
+def report(results):
+    scales = list(results)
+    cases = list(results[scales[0]])
+    print(f"\n{'':>18}" + "".join(f"{scale + 'x ms':>12}{'queries':>8}" for scale in scales) + f"{'growth':>9}")
+    for name in cases:
+        row = "".join(f"{results[scale][name]['ms']:>12.2f}{results[scale][name]['queries']:>8}" for scale in scales)
+        growth = results[scales[-1]][name]["ms"] / max(results[scales[0]][name]["ms"], 1e-6)
+        print(f"{name:>18}{row}{growth:>8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1,10,100")
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=2.0)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp()
+    # The app's settings need a database; every request here is routed to the clinic's own
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'app.db')}", DB_BACKEND="sqlite",
+        ASYNC_DB="false", SECRET_KEY=os.environ.get("SECRET_KEY", "bench"),
+    )
+    params = {"months": args.months, "seed": args.seed, "repeat": args.repeat}
+    results = {scale: run_scale(int(scale), args, workdir) for scale in args.scales.split(",")}
+    report(results)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        # Scales not run this time keep their recorded results
+        saved = baseline["results"] if baseline and baseline["params"] == params else {}
+        for scale, cases in results.items():
+            saved[scale] = {name: {**result, "ms": round(result["ms"], 3)} for name, result in cases.items()}
+        with open(args.baseline, "w") as f:
+            json.dump({"params": params, "results": saved}, f, indent=2, sort_keys=True)
+        print(f"\nbaseline saved to {args.baseline}")
+        return
+    if baseline is None:
+        print(f"\nno baseline at {args.baseline}; record one with --save-baseline")
+        return
+    if baseline["params"] != params:
+        sys.exit(f"baseline was recorded with {baseline['params']}, this run used {params}")
+    failures = compare(results, baseline, args.tolerance)
+    if failures:
+        sys.exit("regressions against the baseline:\n  " + "\n  ".join(failures))
+    print(f"\nno regressions against {args.baseline} (tolerance {args.tolerance}x)")
+
+if __name__ == "__main__":
+    main()
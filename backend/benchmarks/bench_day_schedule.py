@@ -0,0 +1,59 @@
+# Memory and scan cost of a 90-day schedule window: the scheduler's dict
+# bookings versus the compact DaySchedule arrays.
+# Run from backend/: python -m benchmarks.bench_day_schedule
+
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app.core.day_schedule import ScheduleWindow, minute_of
+from app.models.base import Appointment
+from benchmarks.bench_suggest_slot import make_session
+
+def measure(build):
+    # Timed without tracemalloc, which slows allocation-heavy builds unevenly
+    t0 = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    built = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, size, elapsed
+
+def main(repeat=200):
+    engine, db = make_session(60_000)
+    window_start = datetime(2025, 3, 1)
+    rows = db.query(Appointment.therapist_id, Appointment.room_id, Appointment.start_time, Appointment.end_time).filter(
+        Appointment.start_time >= window_start, Appointment.start_time < window_start + timedelta(days=90),
+    ).all()
+    dicts, dict_bytes, dict_build = measure(
+        lambda: [{"slot": start, "therapist": t, "room": r, "end": end} for t, r, start, end in rows]
+    )
+    window, compact_bytes, compact_build = measure(lambda: ScheduleWindow.from_rows(rows))
+    print(f"{len(rows)} bookings over 90 days")
+    print(f"{'':>8} {'bytes/booking':>14} {'build ms':>9}")
+    print(f"{'dicts':>8} {dict_bytes / len(rows):>14.1f} {dict_build * 1000:>9.1f}")
+    print(f"{'compact':>8} {compact_bytes / len(rows):>14.1f} {compact_build * 1000:>9.1f}")
+
+    # Is therapist 3 or room 5 free 10:00-11:00 on a given day?
+    day = datetime(2025, 4, 15)
+    slot_start, slot_end = day.replace(hour=10), day.replace(hour=11)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        any(
+            a["slot"] < slot_end and a["end"] > slot_start and (a["therapist"] == 3 or a["room"] == 5)
+            for a in dicts
+        )
+    dict_scan = (time.perf_counter() - t0) / repeat
+    schedule = window[day.date()]
+    start, end = minute_of(slot_start, day.date()), minute_of(slot_end, day.date())
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        schedule.is_free(3, 5, start, end)
+    compact_scan = (time.perf_counter() - t0) / repeat
+    print(f"conflict check: dicts {dict_scan * 1e6:.0f}us, compact {compact_scan * 1e6:.0f}us")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Report fan-out: one connection per message (send_email) vs. the pooled Mailer.
+# Uses a local aiosmtpd server as the SMTP stand-in (pip install aiosmtpd).
+# Run from backend/: python -m benchmarks.bench_email
+
+import asyncio
+import time
+
+from aiosmtpd.controller import Controller
+
+from app.core import email
+from app.core.config import get_email_settings
+
+PORT = 8025
+MESSAGES = 200
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+def main():
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=PORT)
+    controller.start()
+    settings = get_email_settings()
+    settings.SMTP_SERVER, settings.SMTP_PORT = "127.0.0.1", PORT
+    settings.SMTP_USERNAME = settings.SMTP_PASSWORD = None
+    settings.SMTP_START_TLS = False
+    recipients = [f"manager{i}@clinic.com" for i in range(MESSAGES)]
+    try:
+        t0 = time.perf_counter()
+        for to in recipients:
+            asyncio.run(email.send_email("Daily report", "body", to))
+        t1 = time.perf_counter()
+        mailer = email.Mailer("127.0.0.1", PORT, start_tls=False)
+        result = mailer.send_batch([email.build_message("Daily report", "body", to) for to in recipients])
+        t2 = time.perf_counter()
+        mailer.close()
+    finally:
+        controller.stop()
+    assert result["sent"] == MESSAGES and handler.received == 2 * MESSAGES
+    print(f"{MESSAGES} messages: per-message connections {(t1 - t0) * 1000:.0f} ms, pooled {(t2 - t1) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
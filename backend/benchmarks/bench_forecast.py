@@ -0,0 +1,63 @@
+# No-show model: fit and store on six months of history (as the beat task does),
+# then batch-score a week of 30-minute slots for 15 rooms x 26 therapists.
+# Run from backend/: python -m benchmarks.bench_forecast
+
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.base import Appointment, Employee, Room, RoleEnum
+from app.services import forecasting
+
+def make_session(n, today, seed=0):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(Employee(name=f"T{i}", role=RoleEnum.associate, email=f"t{i}@example.com") for i in range(1, 27))
+    db.add_all(Room(name=f"Room {i}") for i in range(1, 16))
+    db.commit()
+    rng = random.Random(seed)
+    first_day = datetime.combine(today - timedelta(days=forecasting.TRAINING_DAYS), datetime.min.time())
+    rows = []
+    for _ in range(n):
+        start = first_day + timedelta(days=rng.randrange(forecasting.TRAINING_DAYS), hours=8, minutes=30 * rng.randrange(20))
+        # Planted effects: Mondays, therapist 3 and late afternoons no-show more often
+        p = 0.05 + 0.25 * (start.weekday() == 0) + 0.2 * (rng.randrange(1, 27) == 3) + 0.1 * (start.hour >= 16)
+        rows.append({
+            "therapist_id": rng.randrange(1, 27), "client_id": 1, "room_id": rng.randrange(1, 16),
+            "start_time": start, "end_time": start + timedelta(minutes=60), "revenue": 100.0,
+            "status": forecasting.NO_SHOW if rng.random() < p else "completed",
+        })
+    with engine.begin() as conn:
+        conn.execute(Appointment.__table__.insert(), rows)
+    return db
+
+def main(repeat=100):
+    today = date(2025, 7, 1)
+    print(f"{'history':>8} {'fit s':>7} {'week ms':>8} {'cached ms':>10}")
+    for n in (10_000, 60_000):
+        db = make_session(n, today)
+        forecaster = forecasting.Forecaster()
+        t0 = time.perf_counter()
+        forecasting.store_model(db, today)
+        fit = time.perf_counter() - t0
+        forecaster._refresh(db, today)
+        week = 0.0
+        for _ in range(repeat):
+            forecaster.fitted.day_scores = {}
+            t0 = time.perf_counter()
+            forecaster.week(db, today, today=today)
+            week += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            forecaster.week(db, today, today=today)
+        cached = time.perf_counter() - t0
+        print(f"{n:>8} {fit:>7.2f} {week / repeat * 1000:>8.2f} {cached / repeat * 1000:>10.3f}")
+        db.close()
+
+if __name__ == "__main__":
+    main()
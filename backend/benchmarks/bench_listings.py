@@ -0,0 +1,152 @@
+# Week listing of 5,000 appointments with therapist, room and patient names:
+# ORM objects with lazy relationships + jsonable_encoder/json versus the
+# listings read model + orjson. Also a query-count check: the read models must
+# issue the same constant number of queries however many rows they return,
+# and the script exits non-zero if they do not.
+# Run from backend/: python -m benchmarks.bench_listings [--appointments 5000]
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.responses import dumps
+from app.models.base import Appointment, Client, Employee, Room, RoleEnum
+from app.services import listings, rollups
+
+FIRST_DAY = date(2025, 9, 8)
+LAST_DAY = FIRST_DAY + timedelta(days=6)
+# Queries per call of each read model, independent of the number of rows
+QUERY_BUDGET = {"appointments": 1, "schedule_entries": 1, "scheduler_view": 3, "productivity": 1}
+
+def make_session(n, n_therapists=26, n_rooms=15, n_clients=2000, seed=0):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(Room(name=f"Room {i}") for i in range(1, n_rooms + 1))
+    db.add_all(
+        Employee(name=f"Therapist {i}", role=RoleEnum.associate, email=f"t{i}@example.com", commission_rate=0.3)
+        for i in range(1, n_therapists + 1)
+    )
+    db.add_all(Client(name=f"Patient {i}", email=f"p{i}@example.com") for i in range(1, n_clients + 1))
+    db.commit()
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        start = datetime.combine(FIRST_DAY, datetime.min.time()) + timedelta(
+            days=rng.randrange(7), hours=8, minutes=15 * rng.randrange(36),
+        )
+        rows.append({
+            "therapist_id": rng.randrange(1, n_therapists + 1), "client_id": rng.randrange(1, n_clients + 1),
+            "room_id": rng.randrange(1, n_rooms + 1), "start_time": start,
+            "end_time": start + timedelta(minutes=rng.choice((30, 45, 60))), "revenue": 100.0, "status": "booked",
+        })
+    db.execute(Appointment.__table__.insert(), rows)
+    rollups.refresh_days(db, [FIRST_DAY + timedelta(days=n) for n in range(7)])
+    db.commit()
+    return engine, db
+
+def orm_listing(db):
+    # What a straightforward ORM endpoint does: one query, then a lazy load per
+    # distinct therapist/room/patient the rows touch
+    window_start = datetime.combine(FIRST_DAY, datetime.min.time())
+    appointments = db.query(Appointment).filter(
+        Appointment.start_time >= window_start, Appointment.start_time < window_start + timedelta(days=7),
+    ).order_by(Appointment.start_time, Appointment.room_id, Appointment.id).all()
+    payload = {"appointments": [
+        {
+            "id": a.id, "start_time": a.start_time, "end_time": a.end_time, "status": a.status, "revenue": a.revenue,
+            "therapist_id": a.therapist_id, "therapist": a.therapist.name, "room_id": a.room_id, "room": a.room.name,
+            "client_id": a.client_id, "patient": a.client.name,
+        }
+        for a in appointments
+    ]}
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+
+def read_model_listing(db):
+    return dumps({"appointments": listings.appointments(db, FIRST_DAY, LAST_DAY)})
+
+def timed(session_factory, render, repeat):
+    # Best of `repeat`, each on a fresh session so no identity map carries over
+    best = None
+    for _ in range(repeat):
+        db = session_factory()
+        t0 = time.perf_counter()
+        body = render(db)
+        elapsed = time.perf_counter() - t0
+        db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+    def during(self, call):
+        before = self.count
+        call()
+        return self.count - before
+
+def check_query_counts(engine, db):
+    # Each read model, over a small and a large result, against QUERY_BUDGET
+    counter = QueryCounter(engine)
+    ids = [id for id, in db.query(Appointment.id).order_by(Appointment.id)]
+    cases = {
+        "appointments": (
+            lambda: listings.appointments(db, FIRST_DAY, FIRST_DAY, room_ids=[1]),
+            lambda: listings.appointments(db, FIRST_DAY, LAST_DAY),
+        ),
+        "schedule_entries": (
+            lambda: listings.schedule_entries(db, ids[:1]),
+            lambda: listings.schedule_entries(db, ids[:500]),
+        ),
+        "scheduler_view": (
+            lambda: listings.scheduler_view(db, FIRST_DAY - timedelta(days=7)),
+            lambda: listings.scheduler_view(db, FIRST_DAY),
+        ),
+        "productivity": (
+            lambda: listings.productivity(db, FIRST_DAY, FIRST_DAY),
+            lambda: listings.productivity(db, FIRST_DAY, LAST_DAY),
+        ),
+    }
+    failures = []
+    for name, (small, large) in cases.items():
+        counts = (counter.during(small), counter.during(large))
+        print(f"{name:>17}: {counts[0]} / {counts[1]} queries (small / large), budget {QUERY_BUDGET[name]}")
+        if max(counts) > QUERY_BUDGET[name]:
+            failures.append(name)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--appointments", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    engine, db = make_session(args.appointments)
+    failures = check_query_counts(engine, db)
+
+    session_factory = sessionmaker(bind=engine)
+    counter = QueryCounter(engine)
+    print(f"\n{args.appointments} appointments over {FIRST_DAY} - {LAST_DAY}")
+    print(f"{'':>12} {'ms':>8} {'queries':>8} {'KiB':>8}")
+    for name, render in (("orm + json", orm_listing), ("read model", read_model_listing)):
+        queries = counter.during(lambda: render(session_factory()))
+        elapsed, body = timed(session_factory, render, args.repeat)
+        print(f"{name:>12} {elapsed * 1000:>8.1f} {queries:>8} {len(body) / 1024:>8.0f}")
+    db.close()
+    if failures:
+        sys.exit(f"query budget exceeded: {', '.join(failures)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Cost of MetricsMiddleware + the SQLAlchemy cursor hooks: the same routes served
+# by an app with and without instrumentation, in-process over ASGI (no network),
+# so the middleware's share of each request is as large as it can get.
+# Run from backend/: python -m benchmarks.bench_metrics_overhead
+
+import asyncio
+import os
+import tempfile
+import time
+
+async def run(app, paths, n):
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths:
+            await client.get(path)
+        t0 = time.perf_counter()
+        for i in range(n):
+            response = await client.get(paths[i % len(paths)])
+            response.raise_for_status()
+        return (time.perf_counter() - t0) / n
+
+def main(n=2000, rounds=3):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ.update(DATABASE_URL=f"sqlite:///{path}", DB_BACKEND="sqlite", ASYNC_DB="false")
+    from fastapi import FastAPI
+    from app.api import router
+    from app.core.database import Base, SessionLocal, get_engine
+    from app.core.metrics import MetricsMiddleware
+    from app.models.base import Client, Employee, Room, RoleEnum
+    Base.metadata.create_all(get_engine())
+    db = SessionLocal()
+    db.add_all([Room(name="Room 1"), Employee(name="T", role=RoleEnum.associate, email="t@example.com"), Client(name="C")])
+    db.commit()
+    db.close()
+
+    plain = FastAPI()
+    plain.include_router(router)
+    instrumented = FastAPI()
+    instrumented.include_router(router)
+    instrumented.add_middleware(MetricsMiddleware)
+    paths = ["/api/analytics/dashboard?date=2025-06-02", "/api/availability/search?start_date=2030-01-01&limit=20"]
+    timings = {"plain": [], "instrumented": []}
+    for _ in range(rounds):
+        for name, app in (("plain", plain), ("instrumented", instrumented)):
+            timings[name].append(asyncio.run(run(app, paths, n)))
+    best = {name: min(values) for name, values in timings.items()}
+    print(f"plain        {best['plain'] * 1e6:8.1f} us/request")
+    print(f"instrumented {best['instrumented'] * 1e6:8.1f} us/request")
+    print(f"overhead     {(best['instrumented'] / best['plain'] - 1) * 100:8.2f} %")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Month-end payroll: scalar calculate_salary_and_commission loop vs. the vectorized engine.
+# Run from backend/: python -m benchmarks.bench_payroll
+
+import time
+import numpy as np
+
+from app.services.analytics import calculate_payroll, calculate_salary_and_commission
+
+ROLES = ["junior", "junior_associate", "associate", "manager", "team_leader", "partner"]
+
+def make_columns(n_appointments, n_employees=26, n_periods=12, seed=0):
+    rng = np.random.default_rng(seed)
+    employee_ids = np.arange(1, n_employees + 1)
+    roles = rng.choice(ROLES, size=n_employees)
+    fixed = np.where(roles == "junior", 36000.0, np.nan)
+    rates = np.where(roles == "junior", np.nan, rng.choice([0.3, 0.4, 0.5, 0.6], size=n_employees))
+    revenue = rng.choice([600.0, 800.0, 850.0, 900.0, 950.0], size=n_appointments)
+    therapist_ids = rng.integers(1, n_employees + 1, size=n_appointments)
+    periods = rng.integers(0, n_periods, size=n_appointments)
+    return revenue, therapist_ids, periods, employee_ids, roles, fixed, rates, n_periods
+
+def scalar_payroll(revenue, therapist_ids, periods, employee_ids, roles, fixed, rates, n_periods):
+    employees = {
+        int(e): (str(r), 0.0 if np.isnan(f) else float(f), 0.0 if np.isnan(c) else float(c))
+        for e, r, f, c in zip(employee_ids, roles, fixed, rates)
+    }
+    totals = {(e, p): 0.0 for e in employees for p in range(n_periods)}
+    for amount, therapist_id, period in zip(revenue.tolist(), therapist_ids.tolist(), periods.tolist()):
+        totals[therapist_id, period] += amount
+    result = {}
+    for (e, p), amount in totals.items():
+        role, fixed_salary, rate = employees[e]
+        salary, commission = calculate_salary_and_commission(role, amount, fixed_salary, rate)
+        result[e, p] = (salary, commission, amount - salary - commission)
+    return result
+
+def main():
+    columns = make_columns(1_000_000)
+    revenue, therapist_ids, periods, employee_ids, roles, fixed, rates, n_periods = columns
+
+    t0 = time.perf_counter()
+    expected = scalar_payroll(*columns)
+    t1 = time.perf_counter()
+    result = calculate_payroll(revenue, therapist_ids, employee_ids, roles, fixed, rates, periods=periods, n_periods=n_periods)
+    t2 = time.perf_counter()
+
+    for row, employee_id in enumerate(employee_ids):
+        for period in range(n_periods):
+            salary, commission, profit = expected[int(employee_id), period]
+            assert np.isclose(result["salary"][row, period], salary)
+            assert np.isclose(result["commission"][row, period], commission)
+            assert np.isclose(result["profit"][row, period], profit)
+    print(f"1,000,000 appointments: scalar {(t1 - t0) * 1000:.0f} ms, vectorized {(t2 - t1) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
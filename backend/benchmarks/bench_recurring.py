@@ -0,0 +1,104 @@
+# Booking a 52-week treatment package: one /api/appointments/recurring call
+# (one conflict query, one executemany insert, one commit) versus 52 manual-book
+# calls, each with its own conflict check and commit. File-backed SQLite with the
+# app's engine settings, on top of a busy clinic's year of appointments.
+# Run from backend/: python -m benchmarks.bench_recurring [--weeks 52]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_db_engine
+from app.models.base import Appointment, Client, Employee, Room, RoleEnum
+from app.schemas.appointment import AppointmentManualCreate, RecurringAppointmentCreate
+from app.services import booking, recurring
+
+FIRST = datetime(2025, 1, 6, 7)
+
+def seed(engine, n, seed=0):
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(Room(name=f"Room {i}") for i in range(1, 16))
+    db.add_all(Employee(name=f"T{i}", role=RoleEnum.associate, email=f"t{i}@example.com") for i in range(1, 28))
+    db.add(Client(name="C"))
+    db.commit()
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        # Therapist 27 and room 15 are kept free for the series; 7:00 is before opening
+        start = FIRST + timedelta(days=rng.randrange(364), hours=1, minutes=30 * rng.randrange(20))
+        rows.append({
+            "therapist_id": rng.randrange(1, 27), "client_id": 1, "room_id": rng.randrange(1, 15),
+            "start_time": start, "end_time": start + timedelta(minutes=30), "revenue": 100.0,
+        })
+    db.execute(Appointment.__table__.insert(), rows)
+    db.commit()
+    db.close()
+
+def count_queries(engine):
+    counter = [0]
+    event.listen(engine, "before_cursor_execute", lambda *args: counter.__setitem__(0, counter[0] + 1))
+    return counter
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--appointments", type=int, default=60_000)
+    args = parser.parse_args()
+    engine = create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'recurring.db')}")
+    seed(engine, args.appointments)
+    queries = count_queries(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    values = dict(therapist_id=27, client_id=1, revenue=90.0)
+
+    # Separate hours of the same day, so both approaches book the same amount into a free calendar
+    db = Session()
+    queries[0] = 0
+    t0 = time.perf_counter()
+    for week in range(args.weeks):
+        start = FIRST + timedelta(weeks=week, hours=2)
+        booking.manual_book(db, AppointmentManualCreate(
+            room_id=15, start_time=start, end_time=start + timedelta(hours=1), **values,
+        ))
+    one_by_one = (time.perf_counter() - t0, queries[0])
+    db.close()
+
+    db = Session()
+    queries[0] = 0
+    start = FIRST + timedelta(hours=4)
+    t0 = time.perf_counter()
+    result = recurring.book_series(db, RecurringAppointmentCreate(
+        room_id=15, start_time=start, end_time=start + timedelta(hours=1), count=args.weeks, **values,
+    ))
+    series = (time.perf_counter() - t0, queries[0])
+    db.close()
+    assert result["booked"] == args.weeks
+
+    # Same series in a busy room with alternatives: conflicts and their same-day
+    # alternatives come from the same single query
+    db = Session()
+    queries[0] = 0
+    start = FIRST + timedelta(hours=3)
+    t0 = time.perf_counter()
+    plan = recurring.book_series(db, RecurringAppointmentCreate(
+        room_id=1, start_time=start, end_time=start + timedelta(hours=1), count=args.weeks,
+        alternative_room_ids=[2, 3, 15], on_conflict="reschedule", **values,
+    ))
+    rescheduled = (time.perf_counter() - t0, queries[0])
+    db.close()
+    moved = sum(1 for occurrence in plan["occurrences"] if occurrence["status"] == "rescheduled")
+
+    print(f"{args.weeks}-week series over {args.appointments} existing appointments")
+    print(f"{'':>28} {'ms':>8} {'queries':>8}")
+    print(f"{'manual-book x ' + str(args.weeks):>28} {one_by_one[0] * 1000:>8.1f} {one_by_one[1]:>8}")
+    print(f"{'recurring':>28} {series[0] * 1000:>8.1f} {series[1]:>8}")
+    print(f"{'recurring, busy room':>28} {rescheduled[0] * 1000:>8.1f} {rescheduled[1]:>8}  ({moved} rescheduled)")
+
+if __name__ == "__main__":
+    main()
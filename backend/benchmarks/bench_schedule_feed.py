@@ -0,0 +1,125 @@
+# Schedule feed fan-out: 500 SSE clients on one uvicorn worker, bookings made
+# through the API, time until every client has the change and the worker's CPU
+# use while idle and while fanning out.
+# Run from backend/: python -m benchmarks.bench_schedule_feed [--clients 500]
+# Requires httpx in addition to requirements.txt.
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.base import Client, Employee, Room, RoleEnum
+
+DAY = datetime(2025, 9, 8)
+PORT = 8711
+
+def seed(path, n_rooms=15):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(Room(name=f"Room {i}") for i in range(1, n_rooms + 1))
+    db.add_all(Employee(name=f"T{i}", role=RoleEnum.associate, email=f"t{i}@example.com") for i in range(1, n_rooms + 1))
+    db.add(Client(name="C"))
+    db.commit()
+    db.close()
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+async def subscriber(client, connected, received, done):
+    async with client.stream("GET", "/api/scheduler/stream", params={"date": DAY.date().isoformat()}) as response:
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: ") and event == "snapshot":
+                connected.release()
+            elif line.startswith("data: ") and event == "appointments":
+                received.append((time.perf_counter(), line.count('"id"')))
+            if done.is_set():
+                return
+
+async def run(base_url, n_clients, n_bookings, pid):
+    limits = httpx.Limits(max_connections=n_clients + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        connected = asyncio.Semaphore(0)
+        done = asyncio.Event()
+        inboxes = [[] for _ in range(n_clients)]
+        t0 = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber(client, connected, inbox, done)) for inbox in inboxes]
+        for _ in range(n_clients):
+            await connected.acquire()
+        connect_time = time.perf_counter() - t0
+
+        cpu0 = cpu_seconds(pid)
+        await asyncio.sleep(5)
+        idle_cpu = (cpu_seconds(pid) - cpu0) / 5
+
+        latencies = []
+        cpu0, t0 = cpu_seconds(pid), time.perf_counter()
+        for i in range(n_bookings):
+            start = DAY + timedelta(hours=8, minutes=30 * (i // 15))
+            sent = time.perf_counter()
+            response = await client.post("/api/appointments/manual-book", json={
+                "therapist_id": i % 15 + 1, "client_id": 1, "room_id": i % 15 + 1,
+                "start_time": start.isoformat(), "end_time": (start + timedelta(minutes=30)).isoformat(),
+            })
+            response.raise_for_status()
+            # Wait until every client has seen this booking
+            while sum(sum(n for _, n in inbox) for inbox in inboxes) < n_clients * (i + 1):
+                await asyncio.sleep(0.001)
+            latencies.append(max(inbox[-1][0] for inbox in inboxes) - sent)
+        fanout_cpu = (cpu_seconds(pid) - cpu0, time.perf_counter() - t0)
+        done.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    latencies.sort()
+    return connect_time, idle_cpu, fanout_cpu, latencies[len(latencies) // 2], latencies[-1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=30)
+    args = parser.parse_args()
+    path = os.path.join(tempfile.mkdtemp(), "feed.db")
+    seed(path)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", DB_BACKEND="sqlite", ASYNC_DB="false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"], env=env,
+    )
+    base_url = f"http://127.0.0.1:{PORT}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/docs")
+                break
+            except httpx.TransportError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before serving requests")
+                time.sleep(0.1)
+        connect, idle, fanout, p50, worst = asyncio.run(run(base_url, args.clients, args.bookings, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"{args.clients} clients connected in {connect:.2f}s")
+    print(f"worker CPU idle:        {idle * 100:5.1f}%")
+    cpu, wall = fanout
+    print(f"worker CPU fanning out: {cpu / wall * 100:5.1f}%  ({args.bookings} sequential bookings)")
+    print(f"worker CPU per booking: {cpu / args.bookings * 1000:.1f}ms  ({cpu / args.bookings / args.clients * 1e6:.0f}us per client)")
+    print(f"booking -> all clients: p50 {p50 * 1000:.1f}ms, max {worst * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Slot suggestion benchmark: legacy linear scans vs. the occupancy index, built
+# per call from the appointment list (cold, still one O(n) pass) or kept warm
+# and passed in. Only the warm path is flat in the number of bookings; the
+# script exits non-zero if it is not.
+# Run from backend/: python -m benchmarks.bench_scheduler
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.core import scheduler
+
+THERAPISTS = list(range(1, 24))
+ROOMS = list(range(1, 16))
+# Rules as sites.scheduler_rules() resolves them: room 1 is shared by therapist 1
+# and the juniors 2 and 3, who work in at most 3 rooms
+RULES = {"shared_rooms": {1: {1: 0.7, 2: 0.3, 3: 0.3}}, "max_rooms": {2: 3, 3: 3}}
+REQUEST = {"date": "2025-09-08", "therapist": 7, "room": 6}
+
+def make_appointments(n, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2025, 6, 1, 8)
+    appointments = []
+    for _ in range(n):
+        day = start + timedelta(days=rng.randrange(180))
+        slot = day + timedelta(minutes=30 * rng.randrange(20))
+        appointments.append({"slot": slot, "therapist": rng.choice(THERAPISTS), "room": rng.choice(ROOMS)})
+    return appointments
+
+def legacy_suggest_slots(appointments, therapists, rooms, request):
+    candidate_slots = []
+    for slot in scheduler.generate_timeslots(request['date']):
+        if scheduler.is_available(slot, request['therapist'], request['room'], appointments):
+            if scheduler.check_constraints(slot, request, appointments, therapists, rooms, RULES):
+                candidate_slots.append(slot)
+    return candidate_slots[:4]
+
+def timeit(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+# Warm suggestions at the largest size may take this many times the smallest
+# (plus a fixed allowance for timer noise)
+WARM_GROWTH = 5
+WARM_NOISE_MS = 0.1
+
+def main():
+    print(f"{'bookings':>9} {'legacy ms':>10} {'cold ms':>8} {'warm ms':>8}")
+    warm_times = []
+    for n in (100, 1_000, 5_000, 20_000, 100_000):
+        appointments = make_appointments(n)
+        index = scheduler.OccupancyIndex(appointments, RULES)
+        expected = legacy_suggest_slots(appointments, THERAPISTS, ROOMS, REQUEST)
+        assert scheduler.suggest_slots(appointments, THERAPISTS, ROOMS, REQUEST, index=index) == expected
+        assert scheduler.suggest_slots(appointments, THERAPISTS, ROOMS, REQUEST, rules=RULES) == expected
+        legacy = timeit(lambda: legacy_suggest_slots(appointments, THERAPISTS, ROOMS, REQUEST), repeat=3)
+        cold = timeit(lambda: scheduler.suggest_slots(appointments, THERAPISTS, ROOMS, REQUEST, rules=RULES), repeat=3)
+        warm = timeit(lambda: scheduler.suggest_slots(appointments, THERAPISTS, ROOMS, REQUEST, index=index))
+        warm_times.append(warm)
+        print(f"{n:>9} {legacy:>10.2f} {cold:>8.2f} {warm:>8.3f}")
+    if warm_times[-1] > warm_times[0] * WARM_GROWTH + WARM_NOISE_MS:
+        sys.exit(f"warm suggest_slots grew from {warm_times[0]:.3f}ms to {warm_times[-1]:.3f}ms")
+
+if __name__ == "__main__":
+    main()
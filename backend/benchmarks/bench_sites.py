@@ -0,0 +1,113 @@
+# One site's latency as more sites share the database: the same synthetic
+# clinic (benchmarks/clinic.py) is loaded as site 1 next to 0, 9 and 49 other
+# clinics, and site 1's reports, listings, availability and bookings are timed.
+# Every site-scoped query leads with site_id (or a per-site room/therapist id),
+# so site 1's time and query count should not grow with the number of sites.
+# The script exits non-zero if a case is slower than tolerance x its
+# single-site time (beyond a noise floor) or issues more queries.
+# Run from backend/: python -m benchmarks.bench_sites [--sites 1,10,50] [--months 1]
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks.bench_clinic import NOISE_FLOOR_MS, timed
+
+def run(n_sites, args, workdir):
+    from sqlalchemy import event
+    from sqlalchemy.orm import sessionmaker
+    from app.core import database
+    from app.schemas.appointment import AppointmentManualCreate
+    from app.services import availability, booking, forecasting, listings, reports
+    from benchmarks import clinic
+
+    data = clinic.generate(args.scale, args.months, args.seed, sites=n_sites)
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(workdir, f'sites-{n_sites}.db')}")
+    clinic.load(engine, data)
+    print(f"{n_sites} site(s): {len(data['appointments'])} appointments, "
+          f"{sum(a['site_id'] == 1 for a in data['appointments'])} at site 1")
+    day = clinic.busiest_day(data)
+    free_day = data["days"][-1] + timedelta(days=7 - data["days"][-1].weekday())
+    therapist_ids = [e["id"] for e in data["employees"] if e["site_id"] == 1]
+    room_ids = [r["id"] for r in data["rooms"] if r["site_id"] == 1]
+    del data
+    forecasting.forecasters.clear()
+
+    Session = sessionmaker(bind=engine, autoflush=False)
+    queries = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.__setitem__(0, queries[0] + 1))
+
+    def read(build):
+        def call():
+            db = Session()
+            try:
+                return build(db)
+            finally:
+                db.close()
+        return call
+
+    def measure(call, repeat):
+        call()
+        before = queries[0]
+        ms = timed(call, repeat)
+        return {"ms": ms, "queries": round((queries[0] - before) / repeat)}
+
+    bookings = iter(range(len(therapist_ids)))
+
+    def book(db):
+        # A fresh therapist and room/hour each call, so every booking goes in
+        n = next(bookings)
+        start = datetime.combine(free_day, datetime.min.time()).replace(hour=10 + n // len(room_ids))
+        return booking.manual_book(db, AppointmentManualCreate(
+            therapist_id=therapist_ids[n], client_id=1, room_id=room_ids[n % len(room_ids)],
+            start_time=start, end_time=start + timedelta(hours=1), revenue=850,
+        ))
+
+    week_end = day + timedelta(days=6)
+    results = {
+        "dashboard": measure(read(lambda db: reports.build_dashboard(db, day)), args.repeat),
+        "daily report": measure(read(lambda db: reports.build_daily_report(db, day)), args.repeat),
+        "week listing": measure(read(lambda db: listings.appointments(db, day, week_end)), args.repeat),
+        "productivity": measure(read(lambda db: listings.productivity(db, day, week_end)), args.repeat),
+        "availability": measure(read(lambda db: list(availability.search_availability(db, day, day, limit=500))), args.repeat),
+        "manual-book": measure(read(book), args.repeat),
+    }
+    engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sites", default="1,10,50")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--months", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=2.0)
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp()
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'app.db')}", DB_BACKEND="sqlite",
+        ASYNC_DB="false", SECRET_KEY=os.environ.get("SECRET_KEY", "bench"),
+    )
+    counts = [int(n) for n in args.sites.split(",")]
+    results = {n: run(n, args, workdir) for n in counts}
+
+    print(f"\nsite 1 at {args.scale}x{'':>6}" + "".join(f"{f'{n} sites ms':>14}{'queries':>8}" for n in counts))
+    failures = []
+    first = results[counts[0]]
+    for name in first:
+        print(f"{name:>18}" + "".join(f"{results[n][name]['ms']:>14.2f}{results[n][name]['queries']:>8}" for n in counts))
+        for n in counts[1:]:
+            result, base = results[n][name], first[name]
+            if result["queries"] > base["queries"]:
+                failures.append(f"{name} with {n} sites: {result['queries']} queries, {base['queries']} with {counts[0]}")
+            if result["ms"] > base["ms"] * args.tolerance and result["ms"] - base["ms"] > NOISE_FLOOR_MS:
+                failures.append(f"{name} with {n} sites: {result['ms']:.2f}ms, {base['ms']:.2f}ms with {counts[0]}")
+    if failures:
+        sys.exit("site 1 slows down as sites are added:\n  " + "\n  ".join(failures))
+    print(f"\nsite 1 is independent of the number of sites (tolerance {args.tolerance}x)")
+
+if __name__ == "__main__":
+    main()
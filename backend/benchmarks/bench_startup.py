@@ -0,0 +1,128 @@
+# Cold-start budget for the API and the Celery worker. Each measurement is a
+# fresh interpreter started from an empty directory with only the database
+# settings in its environment (no .env, no SMTP_*), so it also checks that both
+# boot without email config. Reports the -X importtime cost of the modules the
+# app loads on top of its frameworks, and the API's time to first response.
+# Exits non-zero if a lazily loaded subsystem is imported at startup or the
+# app's own import time exceeds its budget.
+# Run from backend/: python -m benchmarks.bench_startup [--runs 7]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules only the code paths that need them may import
+LAZY_MODULES = {
+    "api": ("numpy", "pulp", "celery", "redis", "aiosmtplib", "app.core.tasks", "app.core.email"),
+    "worker": ("numpy", "pulp", "fastapi", "redis", "aiosmtplib", "app.core.email"),
+}
+# Import time the app adds on top of the frameworks it is built on, in ms
+IMPORT_BUDGET_MS = {"api": 200, "worker": 150}
+TARGETS = {
+    "api": ("app.main", "fastapi, sqlalchemy.orm, pydantic_settings"),
+    "worker": ("app.core.tasks", "celery.app, celery.schedules, sqlalchemy.orm, pydantic_settings"),
+}
+FIRST_REQUEST = """
+import asyncio
+import app.main
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    if message["type"] == "http.response.start":
+        assert message["status"] == 200, message
+
+asyncio.run(app.main.app({
+    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+    "path": "/api/appointments", "raw_path": b"/api/appointments", "query_string": b"start_date=2025-09-08",
+    "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80), "root_path": "",
+}, receive, send))
+"""
+
+def make_env(workdir):
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("SMTP_", "EMAIL_"))}
+    env.update(
+        PYTHONPATH=BACKEND_DIR, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        DB_BACKEND="sqlite", SECRET_KEY="bench", PYTHONWARNINGS="ignore",
+    )
+    return env
+
+def run(code, env, workdir, importtime=False):
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    t0 = time.perf_counter()
+    result = subprocess.run(args, env=env, cwd=workdir, capture_output=True, text=True)
+    elapsed = time.perf_counter() - t0
+    if result.returncode:
+        sys.exit(f"`{code.strip().splitlines()[-1]}` failed:\n{result.stderr[-2000:]}")
+    return elapsed, result
+
+def import_times(code, env, workdir):
+    # {module: self time in us} from -X importtime
+    _, result = run(code, env, workdir, importtime=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("imported package"):
+            own, _, name = line[len("import time:"):].split("|")
+            times[name.strip()] = int(own)
+    return times
+
+def app_import_ms(module, frameworks, env, workdir, runs):
+    # Import time of the modules `module` loads beyond its frameworks: self
+    # times, best of `runs` per module, so noise in the frameworks' own import
+    # does not count against the budget. Returns (total ms, five largest by
+    # package, with app modules listed individually).
+    framework_modules = set()
+    for _ in range(2):
+        framework_modules.update(import_times(f"import {frameworks}", env, workdir))
+    best = {}
+    for _ in range(runs):
+        for name, own in import_times(f"import {module}", env, workdir).items():
+            if name not in framework_modules:
+                best[name] = min(own, best.get(name, own))
+    by_package = Counter()
+    for name, own in best.items():
+        by_package[name if name.startswith("app.") else name.split(".")[0]] += own
+    return sum(best.values()) / 1000, by_package.most_common(5)
+
+def wall_ms(code, env, workdir, runs):
+    return min(run(code, env, workdir)[0] for _ in range(runs)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp()
+    env = make_env(workdir)
+    run("import app.models.base; from app.core.database import Base, get_engine; Base.metadata.create_all(get_engine())", env, workdir)
+    failures = []
+    for process, (module, frameworks) in TARGETS.items():
+        _, result = run(
+            f"import sys, {module}; print(' '.join(m for m in {LAZY_MODULES[process]!r} if m in sys.modules))",
+            env, workdir,
+        )
+        eager = result.stdout.split()
+        if eager:
+            failures.append(f"{process} imports {', '.join(eager)} at startup")
+        total, largest = app_import_ms(module, frameworks, env, workdir, args.runs)
+        print(f"{process}: {module} adds {total:.0f}ms of imports to {frameworks} (budget {IMPORT_BUDGET_MS[process]}ms)")
+        for name, own in largest:
+            print(f"  {own / 1000:6.1f}ms  {name}")
+        if total > IMPORT_BUDGET_MS[process]:
+            failures.append(f"{process} import adds {total:.0f}ms over its frameworks")
+
+    interpreter = wall_ms("pass", env, workdir, args.runs)
+    first_request = wall_ms(FIRST_REQUEST, env, workdir, args.runs)
+    frameworks = wall_ms(f"import {TARGETS['api'][1]}", env, workdir, args.runs)
+    print(f"\nAPI process start to first response: {first_request:.0f}ms "
+          f"(interpreter {interpreter:.0f}ms, interpreter + frameworks {frameworks:.0f}ms)")
+    if failures:
+        sys.exit("startup budget exceeded:\n  " + "\n  ".join(failures))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# DB-backed smart-book search against a busy clinic's year of appointments.
+# Run from backend/: python -m benchmarks.bench_suggest_slot
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core import scheduler
+from app.models.base import Appointment
+from app.schemas.appointment import AppointmentCreate
+
+def make_session(n, seed=0):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed)
+    first_day = datetime(2025, 1, 1, 8)
+    rows = []
+    for _ in range(n):
+        start = first_day + timedelta(days=rng.randrange(365), minutes=30 * rng.randrange(20))
+        rows.append({
+            "therapist_id": rng.randrange(1, 27), "client_id": 1, "room_id": rng.randrange(1, 16),
+            "start_time": start, "end_time": start + timedelta(minutes=rng.choice((30, 45, 60))), "revenue": 100.0,
+        })
+    with engine.begin() as conn:
+        conn.execute(Appointment.__table__.insert(), rows)
+    return engine, sessionmaker(bind=engine)()
+
+def main(repeat=200):
+    payload = AppointmentCreate(
+        therapist_id=3, client_id=1, room_id=5,
+        start_time=datetime(2025, 6, 2, 10), end_time=datetime(2025, 6, 2, 11),
+    )
+    print(f"{'appointments':>12} {'ms/search':>10} {'queries':>8}")
+    for n in (1_000, 10_000, 60_000):
+        engine, db = make_session(n)
+        queries = []
+        event.listen(engine, "before_cursor_execute", lambda *args: queries.append(1))
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            scheduler.suggest_slot(payload, db, room_ids=[1, 2, 7])
+        elapsed = (time.perf_counter() - t0) / repeat * 1000
+        print(f"{n:>12} {elapsed:>10.2f} {len(queries) / repeat:>8.1f}")
+        db.close()
+
+if __name__ == "__main__":
+    main()
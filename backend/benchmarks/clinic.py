@@ -0,0 +1,198 @@
+# Seeded synthetic clinics for benchmarks: rooms, staff across every RoleEnum
+# role, patients and months of non-overlapping appointments with weekday,
+# hour-of-day and seasonal peaks, for one or more sites. The same (scale,
+# months, seed, sites) always gives the same data. Scale 1 is one site sized
+# like the clinic in app/sample_data.sql.
+# python -m benchmarks.clinic --scale 10 [--sites 3] prints the generated volumes.
+
+import argparse
+import itertools
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.base import Appointment, Client, Employee, Room, RoleEnum, Site
+from app.services import rollups
+
+FIRST_DAY = date(2025, 1, 6)
+OPEN_HOUR, CLOSE_HOUR = 8, 18
+QUARTERS = (CLOSE_HOUR - OPEN_HOUR) * 4
+ROOMS_PER_SCALE = 15
+CLIENTS_PER_SCALE = 2000
+# Every site's first room is shared by its first associate and first two
+# juniors, and juniors work in at most 3 rooms, so the scheduler's rule checks
+# are exercised
+SHARED_ROOM = "Joe's Room [A]"
+# Staff of one scale unit: (role, headcount, fixed salary, commission rate, share of a full caseload)
+STAFF_MIX = (
+    (RoleEnum.junior, 12, 36000, None, 1.0),
+    (RoleEnum.junior_associate, 2, None, 0.3, 1.0),
+    (RoleEnum.associate, 8, None, 0.4, 1.0),
+    (RoleEnum.team_leader, 2, None, 0.6, 0.7),
+    (RoleEnum.manager, 1, None, 0.5, 0.4),
+    (RoleEnum.partner, 1, None, 0.5, 0.3),
+)
+HOURLY_RATE = {
+    RoleEnum.junior: 600, RoleEnum.junior_associate: 750, RoleEnum.associate: 850,
+    RoleEnum.team_leader: 950, RoleEnum.manager: 1100, RoleEnum.partner: 1300,
+}
+# Relative demand: before and after office hours peak, mid-afternoon is quiet
+HOUR_LOAD = (1.4, 1.2, 0.9, 0.8, 1.1, 0.9, 0.6, 0.8, 1.3, 1.5)
+# Monday .. Sunday
+WEEKDAY_LOAD = (0.85, 0.8, 0.8, 0.85, 0.9, 1.0, 0.3)
+# January .. December: New Year resolutions, a summer dip, a quiet December
+MONTH_LOAD = (1.0, 0.95, 0.9, 0.85, 0.85, 0.8, 0.7, 0.7, 0.9, 0.9, 0.85, 0.6)
+# Share of room time booked on the busiest kind of day
+PEAK_OCCUPANCY = 0.85
+DURATIONS = ((2, 0.3), (3, 0.3), (4, 0.4))  # quarters, weight
+STATUSES = (("booked", 0.88), ("no_show", 0.05), ("cancelled", 0.07))
+
+def _staff(site_id, scale, first_id):
+    employees = []
+    for _ in range(scale):
+        for role, headcount, fixed_salary, commission_rate, caseload in STAFF_MIX:
+            for _ in range(headcount):
+                id = first_id + len(employees)
+                employees.append({
+                    "id": id, "site_id": site_id, "name": f"{role.value.replace('_', ' ').title()} {id}",
+                    "role": role, "fixed_salary": fixed_salary, "commission_rate": commission_rate,
+                    "email": f"staff{id}@clinic.example", "is_active": True, "caseload": caseload,
+                })
+    return employees
+
+def _rules(rooms, employees):
+    # Site.scheduler_rules as stored: ids as JSON object keys, limits by role
+    associate = next(e["id"] for e in employees if e["role"] == RoleEnum.associate)
+    juniors = [e["id"] for e in employees if e["role"] == RoleEnum.junior][:2]
+    shares = {str(associate): 0.7, **{str(id): 0.3 for id in juniors}}
+    return {"shared_rooms": {str(rooms[0]["id"]): shares}, "max_rooms": {RoleEnum.junior.value: 3}}
+
+def _day_load(day, rng):
+    noise = rng.uniform(0.9, 1.1)
+    return PEAK_OCCUPANCY * WEEKDAY_LOAD[day.weekday()] * MONTH_LOAD[day.month - 1] * noise
+
+def _appointments(rng, rooms, employees, clients, days, first_id):
+    # Fills each day up to its load, one bitmask of busy quarters per room and therapist
+    staff_weights = list(itertools.accumulate(employee["caseload"] for employee in employees))
+    hours = list(range(len(HOUR_LOAD)))
+    durations, duration_weights = zip(*DURATIONS)
+    statuses, status_weights = zip(*STATUSES)
+    avg_quarters = sum(q * w for q, w in DURATIONS) / sum(duration_weights)
+    room_ids = [room["id"] for room in rooms]
+    client_ids = (clients[0]["id"], clients[-1]["id"])
+    appointments = []
+    for day in days:
+        day_start = datetime.combine(day, datetime.min.time()).replace(hour=OPEN_HOUR)
+        room_busy = dict.fromkeys(room_ids, 0)
+        therapist_busy = {employee["id"]: 0 for employee in employees}
+        target = int(len(rooms) * QUARTERS / avg_quarters * _day_load(day, rng))
+        booked = 0
+        for _ in range(target * 3):
+            if booked == target:
+                break
+            quarters = rng.choices(durations, duration_weights)[0]
+            start = min(rng.choices(hours, HOUR_LOAD)[0] * 4 + rng.choice((0, 2)), QUARTERS - quarters)
+            mask = ((1 << quarters) - 1) << start
+            therapist = rng.choices(employees, cum_weights=staff_weights)[0]
+            if therapist_busy[therapist["id"]] & mask:
+                continue
+            # Staff mostly work from their own room
+            home = room_ids[(therapist["id"] - employees[0]["id"]) % len(room_ids)]
+            for room_id in (home, rng.choice(room_ids), rng.choice(room_ids)):
+                if not room_busy[room_id] & mask:
+                    break
+            else:
+                continue
+            room_busy[room_id] |= mask
+            therapist_busy[therapist["id"]] |= mask
+            begin = day_start + timedelta(minutes=15 * start)
+            appointments.append({
+                "id": first_id + len(appointments), "site_id": therapist["site_id"], "therapist_id": therapist["id"],
+                "client_id": rng.randint(*client_ids), "room_id": room_id,
+                "start_time": begin, "end_time": begin + timedelta(minutes=15 * quarters),
+                "revenue": HOURLY_RATE[therapist["role"]] * quarters / 4,
+                "status": rng.choices(statuses, status_weights)[0],
+            })
+            booked += 1
+    return appointments
+
+def generate(scale=1, months=3, seed=0, first_day=FIRST_DAY, sites=1):
+    # {"sites", "rooms", "employees", "clients", "appointments", "days"}: column
+    # dicts with explicit ids, ready for executemany inserts. Each site is a
+    # clinic of `scale` units with its own seed.
+    days = [first_day + timedelta(days=n) for n in range(30 * months)]
+    data = {"sites": [], "rooms": [], "employees": [], "clients": [], "appointments": [], "days": days}
+    for site_id in range(1, sites + 1):
+        rng = random.Random(seed + 7919 * (site_id - 1))
+        n_rooms = ROOMS_PER_SCALE * scale
+        first_room = len(data["rooms"]) + 1
+        rooms = [
+            {"id": first_room + i, "site_id": site_id, "name": SHARED_ROOM if i == 0 else f"Room {i + 1}"}
+            for i in range(n_rooms)
+        ]
+        employees = _staff(site_id, scale, len(data["employees"]) + 1)
+        first_client = len(data["clients"]) + 1
+        clients = [
+            {"id": id, "site_id": site_id, "name": f"Patient {id}", "email": f"patient{id}@example.com"}
+            for id in range(first_client, first_client + CLIENTS_PER_SCALE * scale)
+        ]
+        data["sites"].append({"id": site_id, "name": f"Clinic {site_id}", "is_active": True, "scheduler_rules": _rules(rooms, employees)})
+        data["rooms"] += rooms
+        data["employees"] += employees
+        data["clients"] += clients
+        data["appointments"] += _appointments(rng, rooms, employees, clients, days, len(data["appointments"]) + 1)
+    return data
+
+def load(engine, clinic, chunk_size=50_000):
+    # Create the schema, bulk insert the clinic and build its daily rollups
+    Base.metadata.create_all(engine)
+    employees = [{k: v for k, v in employee.items() if k != "caseload"} for employee in clinic["employees"]]
+    with engine.begin() as conn:
+        # Replaces the default site created with the table
+        conn.execute(Site.__table__.delete())
+        for model, rows in ((Site, clinic["sites"]), (Room, clinic["rooms"]), (Employee, employees), (Client, clinic["clients"])):
+            conn.execute(model.__table__.insert(), rows)
+        appointments = clinic["appointments"]
+        for start in range(0, len(appointments), chunk_size):
+            conn.execute(Appointment.__table__.insert(), appointments[start:start + chunk_size])
+    with Session(engine) as db:
+        rollups.refresh_days(db, clinic["days"])
+        db.commit()
+
+def busiest_day(clinic, site_id=1):
+    counts = {}
+    for appointment in clinic["appointments"]:
+        if appointment["site_id"] == site_id:
+            day = appointment["start_time"].date()
+            counts[day] = counts.get(day, 0) + 1
+    return max(counts, key=lambda day: (counts[day], day))
+
+def occupancy(clinic):
+    # Booked share of open room time over the generated period
+    minutes = sum((a["end_time"] - a["start_time"]).total_seconds() / 60 for a in clinic["appointments"])
+    return minutes / (len(clinic["rooms"]) * len(clinic["days"]) * QUARTERS * 15)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sites", type=int, default=1)
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    clinic = generate(args.scale, args.months, args.seed, sites=args.sites)
+    elapsed = time.perf_counter() - t0
+    roles = {}
+    for employee in clinic["employees"]:
+        roles[employee["role"].value] = roles.get(employee["role"].value, 0) + 1
+    print(f"{args.sites} site(s) at scale {args.scale}: {len(clinic['rooms'])} rooms, {len(clinic['employees'])} staff, "
+          f"{len(clinic['clients'])} patients, {len(clinic['appointments'])} appointments over {len(clinic['days'])} days "
+          f"({elapsed:.1f}s)")
+    print("staff: " + ", ".join(f"{count} {role}" for role, count in roles.items()))
+    print(f"room occupancy {occupancy(clinic):.0%}, busiest day at site 1 {busiest_day(clinic)}")
+
+if __name__ == "__main__":
+    main()
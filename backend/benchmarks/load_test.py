@@ -0,0 +1,111 @@
+# Local load test: sync (threadpool) vs. async (ASYNC_DB) booking and analytics routes.
+# Starts uvicorn once per mode against a seeded SQLite file (or DATABASE_URL if given),
+# drives it with concurrent httpx clients and reports requests/sec and p99 latency.
+# Run from backend/: python -m benchmarks.load_test [--duration 10] [--concurrency 64]
+# Requires httpx in addition to requirements.txt.
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from app.core.database import Base
+from app.models.base import Appointment
+from app.services import rollups
+from sqlalchemy.orm import sessionmaker
+
+DAY = datetime(2025, 9, 8)
+
+def seed_sqlite(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for stmt in open("app/sample_data.sql").read().split(";"):
+            if "INSERT" in stmt and "alerts" not in stmt:
+                conn.execute(text(stmt.replace("TRUE", "1")))
+        rng = random.Random(0)
+        rows = []
+        for i in range(20_000):
+            start = DAY - timedelta(days=1 + i // 200, hours=-8) + timedelta(minutes=30 * (i % 20))
+            rows.append({
+                "therapist_id": rng.randrange(1, 27), "client_id": rng.randrange(1, 5), "room_id": rng.randrange(1, 16),
+                "start_time": start, "end_time": start + timedelta(minutes=30), "revenue": 800.0,
+            })
+        conn.execute(Appointment.__table__.insert(), rows)
+    db = sessionmaker(bind=engine)()
+    rollups.refresh_days(db, sorted({row["start_time"].date() for row in rows}))
+    db.commit()
+    db.close()
+
+async def drive(base_url, duration, concurrency):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    rng = random.Random(1)
+
+    async def worker(client):
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            if rng.random() < 0.1:
+                start = DAY + timedelta(hours=8, minutes=30 * rng.randrange(20))
+                await client.post("/api/appointments/manual-book", json={
+                    "therapist_id": rng.randrange(1, 27), "client_id": 1, "room_id": rng.randrange(1, 16),
+                    "start_time": start.isoformat(), "end_time": (start + timedelta(minutes=30)).isoformat(),
+                    "revenue": 800,
+                })
+            else:
+                await client.get("/api/analytics/dashboard", params={"date": DAY.date().isoformat()})
+            latencies.append(time.perf_counter() - t0)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    latencies.sort()
+    return len(latencies) / duration, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+def run_mode(async_db, database_url, port, duration, concurrency):
+    env = dict(os.environ, DATABASE_URL=database_url, DB_BACKEND="sqlite" if database_url.startswith("sqlite") else "postgres",
+               ASYNC_DB="true" if async_db else "false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/docs")
+                break
+            except httpx.TransportError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before serving requests")
+                time.sleep(0.1)
+        return asyncio.run(drive(base_url, duration, concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--database-url", help="seeded database to test against (default: temporary SQLite file)")
+    args = parser.parse_args()
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "load.db")
+        seed_sqlite(path)
+        database_url = f"sqlite:///{path}"
+    print(f"{'mode':>6} {'req/s':>8} {'p99 ms':>8}")
+    for port, async_db in ((8701, False), (8702, True)):
+        rps, p99 = run_mode(async_db, database_url, port, args.duration, args.concurrency)
+        print(f"{'async' if async_db else 'sync':>6} {rps:>8.0f} {p99:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -14,19 +14,38 @@ const SmartScheduler = () => {
   const [scheduleData, setScheduleData] = useState<any>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
+  const [resync, setResync] = useState(0);
 
+  // Snapshot for the day, then booking changes pushed over SSE instead of polling
   useEffect(() => {
     setLoading(true);
     setError("");
-    fetch(`${API_URL}/api/scheduler?date=${selectedDate}&type=${selectedAppointmentType}`)
-      .then((res) => {
-        if (!res.ok) throw new Error("Failed to fetch schedule data");
-        return res.json();
-      })
-      .then(setScheduleData)
-      .catch((e) => setError(e.message))
-      .finally(() => setLoading(false));
-  }, [selectedDate, selectedAppointmentType]);
+    const source = new EventSource(`${API_URL}/api/scheduler/stream?date=${selectedDate}&type=${selectedAppointmentType}`);
+    source.addEventListener("snapshot", (e) => {
+      setScheduleData(JSON.parse((e as MessageEvent).data));
+      setError("");
+      setLoading(false);
+    });
+    source.addEventListener("appointments", (e) => {
+      const changes = JSON.parse((e as MessageEvent).data);
+      setScheduleData((current: any) => {
+        if (!current) return current;
+        const byId = new Map((current.appointments || []).map((a: any) => [a.id, a]));
+        changes.forEach((a: any) => byId.set(a.id, a));
+        return { ...current, appointments: Array.from(byId.values()) };
+      });
+    });
+    source.addEventListener("resync", () => {
+      source.close();
+      setResync((n) => n + 1);
+    });
+    source.onerror = () => {
+      // EventSource reconnects on its own and receives a fresh snapshot
+      setError("Lost connection to schedule feed, reconnecting...");
+      setLoading(false);
+    };
+    return () => source.close();
+  }, [selectedDate, selectedAppointmentType, resync]);
 
   const handleExport = () => {
     if (!scheduleData) return;
@@ -155,9 +174,11 @@ const SmartScheduler = () => {
                 <div key={index} className="bg-card p-4 rounded-lg border border-border/50 shadow-soft">
                   <div className="flex items-center justify-between mb-2">
                     <span className="font-semibold text-foreground">{suggestion.time}</span>
-                    <Badge variant="outline" className="text-primary border-primary/30">
-                      {suggestion.confidence}% match
-                    </Badge>
+                    {suggestion.confidence != null && (
+                      <Badge variant="outline" className="text-primary border-primary/30">
+                        {suggestion.confidence}% match
+                      </Badge>
+                    )}
                   </div>
                   <p className="text-sm font-medium text-muted-foreground">{suggestion.therapist}</p>
                   <p className="text-xs text-muted-foreground mt-1">{suggestion.reason}</p>
@@ -203,7 +224,7 @@ const SmartScheduler = () => {
                     </div>
                     <div className="text-right">
                       <p className="text-sm font-medium">Next Available</p>
-                      <p className="text-xs text-muted-foreground">{therapist.nextAvailable}</p>
+                      <p className="text-xs text-muted-foreground">{therapist.nextAvailable ?? "Fully booked"}</p>
                     </div>
                   </div>
                 ))}